@@ -1,19 +1,192 @@
-import sys
+import argparse
+import cProfile
 import json
+import pstats
+import sys
 
-from .artifacts import ArtificialPlayer
+from .artifacts import ArtificialPlayer, Board
+from .batch import run_batch
+from .bitboard import BitBoard
+from .cache import SolutionCache
+from .parallel import parallel_search
+from . import vectorised
+from .tablebase import Tablebase
+from .transposition import TranspositionTable
 
 
 def main():
-    with open(sys.argv[1]) as file:
+    parser = argparse.ArgumentParser(
+        prog='search',
+        description='Finds a winning action sequence for an Expendibots board.')
+    parser.add_argument('file', nargs='+',
+                        help='the json file containing the starting '
+                             'positions of all pieces. With --batch, any '
+                             'number of json files, directories, glob '
+                             'patterns, or JSON lines files (.jsonl, or - '
+                             'for the standard input).')
+    parser.add_argument('--batch', action='store_true',
+                        help='solve every board of the files, and print '
+                             'one JSON result per line as each is solved.')
+    parser.add_argument('--time-limit', type=float, default=None,
+                        help='the maximum time of the search (with --batch, '
+                             'of each search), in seconds: the best partial '
+                             'plan is printed if no solution is found by then.')
+    parser.add_argument('--node-limit', type=int, default=None,
+                        help='the maximum number of nodes of the search '
+                             '(with --batch, of each search).')
+    parser.add_argument('--bitboard', action='store_true',
+                        help='use the bitboard implementation of the board.')
+    parser.add_argument('--engine', choices=ArtificialPlayer.ENGINES,
+                        default='ids',
+                        help='the search algorithm: iterative deepening '
+                             'search (default), IDA*, A*, weighted A*, '
+                             'or beam search.')
+    parser.add_argument('--heuristic', choices=ArtificialPlayer.HEURISTICS,
+                        default='manhattan',
+                        help='the heuristic of the search: the sum of the '
+                             'manhattan distances (default), or an '
+                             'admissible lower bound of the actions left.')
+    parser.add_argument('--weight', type=float, default=2.0,
+                        help='the weight of the heuristic in weighted A* '
+                             '(default 2).')
+    parser.add_argument('--beam-width', type=int, default=64,
+                        help='the number of nodes kept at each depth in '
+                             'beam search (default 64).')
+    parser.add_argument('--tt-size', type=int,
+                        default=TranspositionTable.DEFAULT_SIZE,
+                        help='the maximum number of entries of the '
+                             'transposition table (0 to disable it).')
+    parser.add_argument('--tt-policy', choices=TranspositionTable.POLICIES,
+                        default='depth',
+                        help='the replacement policy of the transposition '
+                             'table: depth-preferred (default), or two-tier.')
+    parser.add_argument('--symmetry', action='store_true',
+                        help='search only one of the rotated or reflected '
+                             'copies of each board.')
+    parser.add_argument('--vectorised', action='store_true',
+                        help='evaluate the next states of each node in '
+                             'batches with NumPy, in the best-first '
+                             'searches (slower at these batch sizes).')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='the number of worker processes searching '
+                             'the subtrees of the first plies, or with '
+                             '--batch, solving the boards (default 1, '
+                             'no worker process).')
+    parser.add_argument('--split-plies', type=int, default=1,
+                        help='the number of plies expanded before the '
+                             'subtrees are given to the workers (default 1).')
+    parser.add_argument('--deterministic', action='store_true',
+                        help='with workers, search every subtree and keep '
+                             'the shortest plan, so that the result does not '
+                             'depend on the timing of the workers.')
+    parser.add_argument('--cache', metavar='PATH', default=None,
+                        help='the SQLite database caching the solutions, '
+                             'checked before searching.')
+    parser.add_argument('--cache-size', type=int,
+                        default=SolutionCache.DEFAULT_SIZE,
+                        help='the maximum number of solutions cached, the '
+                             'least recently used being removed first.')
+    parser.add_argument('--tablebase', metavar='PATH', default=None,
+                        help='the endgame tablebase probed by the searches '
+                             '(built by python -m search.tablebase PATH).')
+    parser.add_argument('--verbose', action='store_true',
+                        help='print the bound and the number of nodes of '
+                             'each iteration.')
+    parser.add_argument('--stats', action='store_true',
+                        help='collect the statistics of the search (nodes '
+                             'per depth, branching factor, booms and moves, '
+                             'heuristic evaluations, transposition hits, time '
+                             'per iteration) and print them, or with --batch, '
+                             'add them to each result.')
+    parser.add_argument('--profile', metavar='PATH', default=None,
+                        help='run under cProfile, and write the report to the '
+                             'file (- for the standard error). The worker '
+                             'processes are not profiled.')
+    parser.add_argument('--profile-sort', choices=('cumulative', 'tottime',
+                                                   'calls'),
+                        default='cumulative',
+                        help='the order of the functions in the profile '
+                             'report (default cumulative).')
+    args = parser.parse_args()
+    if args.profile is None:
+        run(args, parser)
+        return
+    profile = cProfile.Profile()
+    profile.runcall(run, args, parser)
+    if args.profile == '-':
+        pstats.Stats(profile, stream=sys.stderr) \
+            .sort_stats(args.profile_sort).print_stats()
+    else:
+        with open(args.profile, 'w') as file:
+            pstats.Stats(profile, stream=file) \
+                .sort_stats(args.profile_sort).print_stats()
+
+
+def run(args, parser):
+    """
+    Solves the board(s) of the command line arguments.
+    """
+    if args.vectorised and not vectorised.available():
+        parser.error('--vectorised requires NumPy.')
+    if not args.batch and len(args.file) > 1:
+        parser.error('more than one file requires --batch.')
+    if not args.batch and args.workers > 1 \
+            and (args.time_limit is not None or args.node_limit is not None):
+        parser.error('--time-limit and --node-limit require --batch '
+                     'with --workers.')
+
+    options = {'board_type': BitBoard if args.bitboard else Board,
+               'table_size': args.tt_size,
+               'table_policy': args.tt_policy,
+               'vectorised': args.vectorised,
+               'heuristic': args.heuristic,
+               'symmetry': args.symmetry,
+               'cache': None if args.cache is None
+               else SolutionCache(args.cache, args.cache_size),
+               'tablebase': None if args.tablebase is None
+               else Tablebase(args.tablebase),
+               'stats': args.stats}
+
+    if args.batch:
+        run_batch(args.file, options,
+                  {'engine': args.engine, 'weight': args.weight,
+                   'beam_width': args.beam_width},
+                  workers=args.workers, time_limit=args.time_limit,
+                  node_limit=args.node_limit)
+        return
+
+    with open(args.file[0]) as file:
         data = json.load(file)
-        player = ArtificialPlayer(data)
-        # print("# From this state, there are "
-        #       + str(player.get_next_states(player.start_state).__len__())
-        #       + " posible next states.")
 
-    # Apply iterative deepening search
-    player.start_searching()
+    if args.workers > 1:
+        actions, nodes = parallel_search(data, options, args.workers,
+                                         plies=args.split_plies,
+                                         engine=args.engine,
+                                         weight=args.weight,
+                                         beam_width=args.beam_width,
+                                         deterministic=args.deterministic)
+        if args.verbose:
+            for (i, subtree_nodes) in enumerate(nodes):
+                if subtree_nodes is None:
+                    print('# Subtree {}: cancelled.'.format(i))
+                else:
+                    print('# Subtree {}: {} nodes.'.format(i, subtree_nodes))
+        if actions is None:
+            print('No winning action sequence found. Assume failure.')
+        for action in actions or []:
+            print(action)
+        return
+
+    player = ArtificialPlayer(data, **options)
+    # print("# From this state, there are "
+    #       + str(player.get_next_states(player.start_state).__len__())
+    #       + " posible next states.")
+
+    # Apply the chosen search algorithm
+    player.start_searching(engine=args.engine, verbose=args.verbose,
+                           weight=args.weight, beam_width=args.beam_width,
+                           time_limit=args.time_limit,
+                           node_limit=args.node_limit)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+
+"""
+File: actions.py
+Contains the actions (MOVE, or BOOM) of the Expendibots game.
+An action can also be packed into one integer (see Action.to_int), to
+be kept by the search algorithms at the cost of a few bytes.
+Note: this file currently follows Python 3.7 syntax.
+"""
+
+__author__ = 'Natural Stupidity'
+__copyright__ = '© 2020 Natural Stupidity, Expendibots Game'
+__version__ = '1.0'
+__email__ = 'b.tran17@student.unimelb.edu.au'
+
+SIZE = 8
+# The bits of a packed action: the type (0 for MOVE, 1 for BOOM), the
+# number of pieces moved (4 bits), the origin square (6 bits), and the
+# destination square (6 bits), the squares being numbered as x * 8 + y.
+BOOM_BIT = 1
+N_SHIFT = 1
+ORIGIN_SHIFT = 5
+DESTINATION_SHIFT = 11
+SQUARE_MASK = 0x3F
+N_MASK = 0xF
+
+
+class Action:
+    """
+    Abstract class of a possible action that can be
+    applied to a Board. An object of this class
+    encapsulates the information on when the Player
+    makes a move (BOOM, or MOVE).
+    """
+    __slots__ = ()
+
+    def apply_to(self, board):
+        """
+        Applies the action to the board, in place, and returns
+        the undo entry to be given to board.unmake.
+        :param board: the board to be changed.
+        """
+        raise NotImplementedError
+
+    def to_tuple(self) -> tuple:
+        """
+        Returns the action in the format of the referee:
+        ('MOVE', n, origin, destination), or ('BOOM', origin).
+        """
+        raise NotImplementedError
+
+    def to_int(self) -> int:
+        """
+        Returns the action packed into one integer (see from_int).
+        """
+        raise NotImplementedError
+
+
+class Move(Action):
+    """
+    Encapsulates a MOVE action. To use this class, one must
+    supply two 2-tuples: origin=(x1,y1) and destination=(x2,y2).
+    """
+    __slots__ = ('n', 'origin', 'destination')
+
+    def __init__(self, n, origin: tuple, destination: tuple):
+        self.n = n
+        self.origin = origin
+        self.destination = destination
+
+    def apply_to(self, board):
+        return board.make_move(self.origin[0], self.origin[1], self.n,
+                               self.destination[0], self.destination[1])
+
+    def to_tuple(self) -> tuple:
+        return 'MOVE', self.n, self.origin, self.destination
+
+    def to_int(self) -> int:
+        return self.n << N_SHIFT \
+            | (self.origin[0] * SIZE + self.origin[1]) << ORIGIN_SHIFT \
+            | (self.destination[0] * SIZE + self.destination[1]) \
+            << DESTINATION_SHIFT
+
+    def __str__(self):
+        return "MOVE {} from {} to {}.".format(self.n, self.origin, self.destination)
+
+
+class Boom(Action):
+    """
+    Encapsulates a BOOM action. To use this class, one must
+    supple one 2-tuples: origin=(x,y).
+    """
+    __slots__ = ('origin',)
+
+    def __init__(self, origin: tuple):
+        self.origin = origin
+
+    def apply_to(self, board):
+        return board.make_boom(self.origin[0], self.origin[1])
+
+    def to_tuple(self) -> tuple:
+        return 'BOOM', self.origin
+
+    def to_int(self) -> int:
+        return BOOM_BIT | (self.origin[0] * SIZE + self.origin[1]) << ORIGIN_SHIFT
+
+    def __str__(self) -> str:
+        return "BOOM at {}.".format(self.origin)
+
+
+def from_tuple(action_tuple) -> Action:
+    """
+    Returns the action given in the format of the referee (see
+    Action.to_tuple), the coordinates being tuples or lists.
+    :param action_tuple: ('MOVE', n, origin, destination), or
+    ('BOOM', origin).
+    """
+    if action_tuple[0] == 'BOOM':
+        return Boom(tuple(action_tuple[1]))
+    if action_tuple[0] == 'MOVE':
+        return Move(action_tuple[1], tuple(action_tuple[2]),
+                    tuple(action_tuple[3]))
+    raise ValueError('Unknown action: {}.'.format(action_tuple))
+
+
+def from_int(code) -> Action:
+    """
+    Returns the action packed into the integer (see Action.to_int).
+    :param code: the packed action.
+    """
+    origin = divmod(code >> ORIGIN_SHIFT & SQUARE_MASK, SIZE)
+    if code & BOOM_BIT:
+        return Boom(origin)
+    return Move(code >> N_SHIFT & N_MASK, origin,
+                divmod(code >> DESTINATION_SHIFT & SQUARE_MASK, SIZE))
@@ -0,0 +1,320 @@
+#!/usr/bin/env python
+
+"""
+File: adversarial.py
+Contains the adversarial search of the full Expendibots game, where
+white and black take turns: a negamax alpha-beta search, deepened
+iteratively until the time of the turn runs out, with a transposition
+table, and the actions ordered by the best action of the table, the
+booms capturing pieces of the opponent, the killer actions and the
+history heuristic. Positions are evaluated by the difference of the
+numbers of pieces.
+Note: this file currently follows Python 3.7 syntax.
+"""
+
+from .actions import Boom, from_int
+from .movegen import legal_actions
+from .transposition import TranspositionTable
+from .zobrist import SIDE_KEY
+from math import inf
+from time import perf_counter
+
+__author__ = 'Natural Stupidity'
+__copyright__ = '© 2020 Natural Stupidity, Expendibots Game'
+__version__ = '1.0'
+__email__ = 'b.tran17@student.unimelb.edu.au'
+
+OPPONENT = {'white': 'black', 'black': 'white'}
+# The score of a won position, minus the number of plies to the win,
+# so that the quickest win is preferred. Any score beyond WIN - MAX_PLY
+# is a win (or a loss) found by the search.
+WIN = 1000
+MAX_PLY = 100
+# The kinds of the scores stored in the transposition table.
+EXACT, LOWER, UPPER = 0, 1, 2
+
+
+def evaluate(board, color) -> int:
+    """
+    Returns the value of the board for the player of the given color:
+    its number of pieces minus the number of pieces of its opponent.
+    :param board: the board, either artifacts.Board or bitboard.BitBoard.
+    :param color: the color of the player, 'white' or 'black'.
+    """
+    return board.piece_count(color) - board.piece_count(OPPONENT[color])
+
+
+def position_key(board, color) -> int:
+    """
+    Returns the key of the position: the board and the side to move.
+    """
+    return board.key ^ SIDE_KEY if color == 'black' else board.key
+
+
+def _to_table(score, ply) -> int:
+    """
+    Returns the score stored in the transposition table: the scores of
+    wins and losses are counted from the position, not from the root.
+    """
+    if score > WIN - MAX_PLY:
+        return score + ply
+    if score < MAX_PLY - WIN:
+        return score - ply
+    return score
+
+
+def _from_table(score, ply) -> int:
+    """
+    Returns the score read from the transposition table, counted from
+    the root (the inverse of _to_table).
+    """
+    if score > WIN - MAX_PLY:
+        return score - ply
+    if score < MAX_PLY - WIN:
+        return score + ply
+    return score
+
+
+class AlphaBeta:
+    """
+    The negamax alpha-beta search of a player of the game. The
+    transposition table and the history heuristic are kept from one
+    search to the next (the history being halved), so that the
+    searches of the following turns start from what was learnt.
+    """
+    # The number of nodes between two checks of the deadline.
+    CHECK_INTERVAL = 1024
+
+    def __init__(self, table_size=TranspositionTable.DEFAULT_SIZE,
+                 table_policy='depth'):
+        """
+        :param table_size: the maximum number of entries of the
+        transposition table, or 0 to search without one.
+        :param table_policy: the replacement policy of the
+        transposition table, 'depth' or 'two-tier'.
+        """
+        self.table = TranspositionTable(table_size, table_policy) \
+            if table_size > 0 else None
+        # history[color][action] is the sum of the squared depths at
+        # which the (packed) action caused a cutoff.
+        self.history = {'white': {}, 'black': {}}
+        # killers[ply] are the last two quiet actions causing a cutoff
+        # at that ply, packed.
+        self.killers = []
+        self.nodes = 0
+        self.deadline = None
+        self.stopped = False
+        # The (depth, score, nodes) of every completed iteration of the
+        # last search.
+        self.iterations = []
+
+    def search(self, board, color, time_limit=None, max_depth=MAX_PLY):
+        """
+        Returns the best action of the player on the board, found by
+        iterative deepening until the time limit or the maximum depth
+        is reached, or a win (or a loss) is found. The board is changed
+        during the search, then restored.
+        :param board: the board, either artifacts.Board or bitboard.BitBoard.
+        :param color: the color of the player to move.
+        :param time_limit: the time of the search in seconds, or None.
+        :param max_depth: the maximum depth of the search.
+        :return: the best action, or None if the player cannot act.
+        """
+        self.nodes = 0
+        self.stopped = False
+        self.iterations = []
+        self.killers = []
+        self.deadline = None if time_limit is None \
+            else perf_counter() + time_limit
+        for table in self.history.values():
+            for action in table:
+                table[action] //= 2
+        best = None
+        for depth in range(1, min(max_depth, MAX_PLY) + 1):
+            score, action = self._root(board, color, depth, best)
+            if self.stopped:
+                if action is not None:
+                    best = action
+                break
+            best = action
+            self.iterations.append((depth, score, self.nodes))
+            if best is None or abs(score) > WIN - MAX_PLY:
+                break
+        if best is None:
+            # Out of time before any action has been searched.
+            best = next(iter(self.order(board, color, 0)), None)
+        return best
+
+    def _out_of_time(self) -> bool:
+        """
+        Counts a node, and returns True if the search has run out of
+        time, checking the deadline once every CHECK_INTERVAL nodes.
+        """
+        self.nodes += 1
+        if self.deadline is not None and not self.stopped \
+                and self.nodes % AlphaBeta.CHECK_INTERVAL == 0:
+            self.stopped = perf_counter() >= self.deadline
+        return self.stopped
+
+    def order(self, board, color, ply, best=None) -> list:
+        """
+        Returns the legal actions of the player, in the order they are
+        searched: the best action of the transposition table first, then
+        the booms capturing pieces of the opponent (the greatest net
+        gain first), then the killer actions of the ply, then the other
+        moves (by their history), then the other booms.
+        :param board: the board.
+        :param color: the color of the player.
+        :param ply: the number of actions from the root.
+        :param best: the best action found before, packed, or None.
+        """
+        opponent = OPPONENT[color]
+        own, other = board.piece_count(color), board.piece_count(opponent)
+        killers = self.killers[ply] if ply < len(self.killers) else ()
+        history = self.history[color]
+
+        def rank(action):
+            code = action.to_int()
+            if code == best:
+                return 0, 0
+            if isinstance(action, Boom):
+                undo_entry = action.apply_to(board)
+                captured = other - board.piece_count(opponent)
+                gain = captured - (own - board.piece_count(color))
+                board.unmake(undo_entry)
+                return (1 if captured > 0 and gain >= 0 else 4), -gain
+            if code in killers:
+                return 2, 0
+            return 3, -history.get(code, 0)
+
+        return sorted(legal_actions(board, color), key=rank)
+
+    def _root(self, board, color, depth, best):
+        """
+        Searches the root of one iteration, and returns the (score, best
+        action). If the search runs out of time, the action is the best
+        one of the actions fully searched, or None: the best action of
+        the previous iteration being searched first, it is only replaced
+        by a better one.
+        """
+        alpha, beta = -inf, inf
+        best_action = None
+        for action in self.order(board, color, 0,
+                                 None if best is None else best.to_int()):
+            undo_entry = action.apply_to(board)
+            score = -self._negamax(board, OPPONENT[color], depth - 1,
+                                   -beta, -alpha, 1)
+            board.unmake(undo_entry)
+            if self.stopped:
+                break
+            if score > alpha:
+                alpha, best_action = score, action
+        if self.table is not None and best_action is not None \
+                and not self.stopped:
+            self.table.store(position_key(board, color), depth,
+                             (_to_table(alpha, 0), EXACT,
+                              best_action.to_int()))
+        return alpha, best_action
+
+    def _negamax(self, board, color, depth, alpha, beta, ply) -> float:
+        """
+        Returns the score of the board for the player to move, searched
+        to the given depth, within the window (alpha, beta): a score at
+        most alpha is an upper bound, and at least beta, a lower bound.
+        """
+        if self._out_of_time():
+            return 0
+        opponent = OPPONENT[color]
+        own, other = board.piece_count(color), board.piece_count(opponent)
+        if own == 0 or other == 0:
+            # Game over: a draw if both players have lost all their pieces.
+            return 0 if own == other else WIN - ply if other == 0 \
+                else ply - WIN
+        if depth <= 0 or ply >= MAX_PLY:
+            return evaluate(board, color)
+
+        # Already searched at least this deep: the stored score is
+        # exact, or narrows the window.
+        alpha_original = alpha
+        key = position_key(board, color)
+        entry = None if self.table is None else self.table.probe(key)
+        best = None
+        if entry is not None:
+            entry_depth, (score, kind, best) = entry
+            if entry_depth >= depth:
+                score = _from_table(score, ply)
+                if kind == EXACT:
+                    return score
+                if kind == LOWER:
+                    alpha = max(alpha, score)
+                else:
+                    beta = min(beta, score)
+                if alpha >= beta:
+                    return score
+
+        best_score, best_action = -inf, None
+        for action in self.order(board, color, ply, best):
+            undo_entry = action.apply_to(board)
+            score = -self._negamax(board, opponent, depth - 1,
+                                   -beta, -alpha, ply + 1)
+            board.unmake(undo_entry)
+            if self.stopped:
+                return 0
+            if score > best_score:
+                best_score, best_action = score, action
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                if not isinstance(action, Boom):
+                    self._record_cutoff(color, action.to_int(), depth, ply)
+                break
+        if best_action is None:
+            return evaluate(board, color)
+
+        if self.table is not None:
+            kind = UPPER if best_score <= alpha_original \
+                else LOWER if best_score >= beta else EXACT
+            self.table.store(key, depth, (_to_table(best_score, ply), kind,
+                                          best_action.to_int()))
+        return best_score
+
+    def _record_cutoff(self, color, code, depth, ply):
+        """
+        Records a quiet action causing a cutoff, as a killer action of
+        the ply, and in the history of the player.
+        """
+        while len(self.killers) <= ply:
+            self.killers.append([None, None])
+        killers = self.killers[ply]
+        if killers[0] != code:
+            killers[1] = killers[0]
+            killers[0] = code
+        history = self.history[color]
+        history[code] = history.get(code, 0) + depth * depth
+
+    def principal_variation(self, board, color, max_length=MAX_PLY) -> list:
+        """
+        Returns the best line of play from the board, read from the
+        transposition table.
+        """
+        line = []
+        seen = set()
+        undo_entries = []
+        key = position_key(board, color)
+        while len(line) < max_length and self.table is not None \
+                and key not in seen:
+            seen.add(key)
+            entry = self.table.probe(key)
+            if entry is None or entry[1][2] is None:
+                break
+            action = from_int(entry[1][2])
+            if action.to_tuple() not in [legal.to_tuple() for legal
+                                         in legal_actions(board, color)]:
+                # A collision of the keys of two positions.
+                break
+            line.append(action)
+            undo_entries.append(action.apply_to(board))
+            color = OPPONENT[color]
+            key = position_key(board, color)
+        for undo_entry in reversed(undo_entries):
+            board.unmake(undo_entry)
+        return line
@@ -6,19 +6,25 @@ Contains game artifacts for the Expendibots game.
 Note: this file currently follows Python 3.7 syntax.
 """
 
+from . import engines, vectorised as vectorised_module
+from .actions import Action, Boom
+from .heuristics import MANHATTAN, NO_DISTANCES, add_black, \
+    admissible_estimate, black_contribution, white_contribution
+from .movegen import NEIGHBOURS, legal_actions
+from .stats import SearchStats
+from .symmetry import canonical_key
+from .transposition import TranspositionTable
 from .util import print_board as util_print_board
-from collections import defaultdict, deque
-from copy import deepcopy
-from sys import setrecursionlimit
-from math import sqrt
+from .zobrist import stack_key
+from collections import defaultdict
+from math import inf, sqrt
+from time import perf_counter
 
 __author__ = 'Natural Stupidity'
 __copyright__ = '© 2020 Natural Stupidity, Expendibots Game'
 __version__ = '1.0'
 __email__ = 'b.tran17@student.unimelb.edu.au'
 
-setrecursionlimit(10000)
-
 
 class Board:
     """
@@ -27,9 +33,15 @@ class Board:
     game, which are: moving horizontally or vertically, and the
     boom action. All of these actions strictly follow the rules
     of the Expendibots game.
+    The board also keeps its Zobrist key, an index of the stacks and
+    of the number of pieces of each color, and the value of the
+    heuristic of the ArtificialPlayer, which are all updated
+    incrementally by these actions.
     """
     SIZE = 8
     SIZE_INDEX = SIZE - 1
+    __slots__ = ('board', 'key', 'pieces', 'counts', 'black_distances',
+                 'heuristic_value', '_components')
 
     def __init__(self, data):
         """
@@ -37,25 +49,156 @@ class Board:
         """
         self.board = [[None for j in range(0, Board.SIZE)]
                       for i in range(0, Board.SIZE)]
+        self.key = 0
+        self.pieces = {'white': {}, 'black': {}}
+        self.counts = {'white': 0, 'black': 0}
+        self.black_distances = NO_DISTANCES
+        self.heuristic_value = 0
+        self._components = None
         for pile in data['white']:
-            self.board[pile[1]][pile[2]] = ['white', pile[0]]
+            self._set_cell(pile[1], pile[2], ['white', pile[0]])
         for pile in data['black']:
-            self.board[pile[1]][pile[2]] = ['black', pile[0]]
+            self._set_cell(pile[1], pile[2], ['black', pile[0]])
 
     def __str__(self) -> str:
         return self.board.__str__()
 
     def __eq__(self, o: object) -> bool:
-        return isinstance(o, Board) and \
+        return isinstance(o, Board) and self.key == o.key and \
                self.board.__eq__(o.board)
 
     def __ne__(self, o: object) -> bool:
-        if not isinstance(o, Board):
-            return True
-        return self.board.__ne__(o.board)
+        return not self.__eq__(o)
 
     def __hash__(self) -> int:
-        return str(self.board).__hash__()
+        return self.key
+
+    def _set_cell(self, x, y, cell):
+        """
+        Replaces the stack at (x, y), keeping the Zobrist key (XOR
+        being its own inverse), the index of the stacks, and the value
+        of the heuristic up to date. Changing a white stack costs O(1),
+        adding or removing a black stack costs O(number of white stacks)
+        plus one update of the distances to the black stacks.
+        Stacks are never changed in place, so that they can be shared
+        between copies of the board.
+        :param x: the x-coordinate of the stack.
+        :param y: the y-coordinate of the stack.
+        :param cell: the new stack [color, height], or None.
+        """
+        square = x * Board.SIZE + y
+        old_cell = self.board[x][y]
+        if old_cell is not None:
+            self.key ^= stack_key(old_cell[0], square, old_cell[1])
+            del self.pieces[old_cell[0]][(x, y)]
+            self.counts[old_cell[0]] -= old_cell[1]
+            if old_cell[0] == 'white':
+                self.heuristic_value -= white_contribution(
+                    self.black_distances, square, old_cell[1])
+            elif cell is None or cell[0] != 'black':
+                self.black_distances = add_black(self.black_distances,
+                                                 square, -1)
+                self.heuristic_value -= black_contribution(
+                    self._white_squares(), square)
+        if cell is not None:
+            self.key ^= stack_key(cell[0], square, cell[1])
+            self.pieces[cell[0]][(x, y)] = cell[1]
+            self.counts[cell[0]] += cell[1]
+            if cell[0] == 'white':
+                self.heuristic_value += white_contribution(
+                    self.black_distances, square, cell[1])
+            elif old_cell is None or old_cell[0] != 'black':
+                self.black_distances = add_black(self.black_distances,
+                                                 square, 1)
+                self.heuristic_value += black_contribution(
+                    self._white_squares(), square)
+        self.board[x][y] = cell
+        self._components = None
+
+    def _white_squares(self) -> list:
+        """
+        Returns the (square, n) of all white stacks.
+        """
+        return [(x * Board.SIZE + y, n)
+                for ((x, y), n) in self.pieces['white'].items()]
+
+    def piece_count(self, color) -> int:
+        """
+        Returns the number of pieces of the given color on the board.
+        :param color: 'white' or 'black'.
+        """
+        return self.counts[color]
+
+    def copy(self):
+        """
+        Returns an independent copy of the instance, cheaper
+        than copy.deepcopy.
+        """
+        other = Board.__new__(Board)
+        other.board = [row[:] for row in self.board]
+        other.key = self.key
+        other.pieces = {'white': dict(self.pieces['white']),
+                        'black': dict(self.pieces['black'])}
+        other.counts = dict(self.counts)
+        other.black_distances = self.black_distances
+        other.heuristic_value = self.heuristic_value
+        other._components = self._components
+        return other
+
+    def __deepcopy__(self, memo):
+        return self.copy()
+
+    def make_move(self, start_x, start_y, n, dest_x, dest_y):
+        """
+        Moves n pieces from the place of origin to the destination,
+        in place, and returns the undo entry of this movement. An
+        exception is thrown (and the board is left untouched) if the
+        movement violates the rules in Expendibots: a ValueError if the
+        destination is on neither the row nor the column of the origin.
+        :param start_x: the x-coordinate of the place of origin.
+        :param start_y: the y-coordinate of the place of origin.
+        :param n: number of pieces to be moved.
+        :param dest_x: the x-coordinate of the destination.
+        :param dest_y: the y-coordinate of the destination.
+        :return: the entry to be given to unmake.
+        """
+        if start_x != dest_x and start_y != dest_y:
+            raise ValueError('Invalid movement (neither horizontal nor '
+                             'vertical).')
+        cells = tuple((x, y, self.board[x][y])
+                      for (x, y) in ((start_x, start_y), (dest_x, dest_y))
+                      if 0 <= x < Board.SIZE and 0 <= y < Board.SIZE)
+        undo_entry = (cells, self._components)
+        if dest_y == start_y:
+            self.move_horizontally(start_x, start_y, n, dest_x - start_x)
+        else:
+            self.move_vertically(start_x, start_y, n, dest_y - start_y)
+        return undo_entry
+
+    def make_boom(self, start_x, start_y):
+        """
+        Initiates an EXPLOSION with a starting point, in place, and
+        returns the undo entry of this explosion, which holds all
+        the stacks that were removed.
+        :param start_x: the x-coordinate of the starting point
+        :param start_y: the y-coordinate of the starting point.
+        :return: the entry to be given to unmake.
+        """
+        region = self._explosion_of(start_x, start_y)
+        undo_entry = (tuple((x, y, self.board[x][y]) for (x, y) in region),
+                      self._components)
+        self._remove(region)
+        return undo_entry
+
+    def unmake(self, undo_entry):
+        """
+        Reverts the last action made by make_move or make_boom.
+        :param undo_entry: the entry returned by that action.
+        """
+        cells, components = undo_entry
+        for (x, y, cell) in cells:
+            self._set_cell(x, y, cell)
+        self._components = components
 
     def to_printable_dict(self) -> dict:
         """
@@ -77,6 +220,14 @@ class Board:
                          message=self.__hash__(),
                          compact=False)
 
+    def color_of(self, square):
+        """
+        Returns the color of the stack on the square (x * 8 + y),
+        or None if the square is empty.
+        """
+        cell = self.board[square // Board.SIZE][square % Board.SIZE]
+        return None if cell is None else cell[0]
+
     def has_same_color(self, x1, y1, x2, y2):
         """
         Returns true if the two stacks at the given coordinates
@@ -92,42 +243,68 @@ class Board:
             else self.board[x2][y2][0]
         return color1 == color2
 
-    def boom(self, start_x, start_y):
+    def _explosion_of(self, start_x, start_y) -> list:
+        """
+        Returns the coordinates of all stacks reached by an explosion
+        starting at (start_x, start_y), i.e. the 8-connected group of
+        stacks containing that square, found without recursion.
+        :param start_x: the x-coordinate of the starting point
+        :param start_y: the y-coordinate of the starting point.
+        """
+        if self.board[start_x][start_y] is None:
+            return []
+        start = start_x * Board.SIZE + start_y
+        region = [start]
+        reached = {start}
+        i = 0
+        while i < len(region):
+            for square in NEIGHBOURS[region[i]]:
+                if square not in reached \
+                        and self.board[square // Board.SIZE][square % Board.SIZE] is not None:
+                    reached.add(square)
+                    region.append(square)
+            i += 1
+        return [divmod(square, Board.SIZE) for square in region]
+
+    def components(self) -> list:
+        """
+        Returns the 8-connected groups of stacks on the board, as
+        tuples of square indexes (x * 8 + y). A boom at any stack of a
+        group removes exactly that group. The result is cached until
+        the board is changed.
+        """
+        if self._components is None:
+            components = []
+            reached = set()
+            for i in range(0, Board.SIZE):
+                for j in range(0, Board.SIZE):
+                    if self.board[i][j] is not None and (i, j) not in reached:
+                        region = self._explosion_of(i, j)
+                        reached.update(region)
+                        components.append(tuple(sorted(
+                            x * Board.SIZE + y for (x, y) in region)))
+            self._components = components
+        return self._components
+
+    def boom(self, start_x, start_y) -> set:
         """
         Initiates an EXPLOSION with a starting point.
         An explosion (or boom action) follows the rules of
         the Expendibots game.
         :param start_x: the x-coordinate of the starting point
         :param start_y: the y-coordinate of the starting point.
+        :return: the set of coordinates of the removed stacks.
         """
+        removed = self._explosion_of(start_x, start_y)
+        self._remove(removed)
+        return set(removed)
 
-        self.board[start_x][start_y] = None
-
-        # Up, down, left, right corners
-        if start_y < Board.SIZE_INDEX \
-                and self.board[start_x][start_y + 1] is not None:
-            self.boom(start_x, start_y + 1)
-        if start_y > 0 and self.board[start_x][start_y - 1] is not None:
-            self.boom(start_x, start_y - 1)
-        if start_x > 0 and self.board[start_x - 1][start_y] is not None:
-            self.boom(start_x - 1, start_y)
-        if start_x < Board.SIZE_INDEX \
-                and self.board[start_x + 1][start_y] is not None:
-            self.boom(start_x + 1, start_y)
-
-        # Diagonal corners
-        if start_x > 0 and start_y > 0 \
-                and self.board[start_x - 1][start_y - 1] is not None:
-            self.boom(start_x - 1, start_y - 1)
-        if start_x < Board.SIZE_INDEX and start_y < Board.SIZE_INDEX \
-                and self.board[start_x + 1][start_y + 1] is not None:
-            self.boom(start_x + 1, start_y + 1)
-        if start_x > 0 and start_y < Board.SIZE_INDEX \
-                and self.board[start_x - 1][start_y + 1] is not None:
-            self.boom(start_x - 1, start_y + 1)
-        if start_x < 0 and start_y > Board.SIZE_INDEX \
-                and self.board[start_x + 1][start_y - 1] is not None:
-            self.boom(start_x + 1, start_y - 1)
+    def _remove(self, region):
+        """
+        Removes all stacks at the given coordinates from the board.
+        """
+        for (x, y) in region:
+            self._set_cell(x, y, None)
 
     def move_horizontally(self, start_x, start_y, n, dx):
         """
@@ -149,20 +326,18 @@ class Board:
         if not start_x + dx in range(0, Board.SIZE):
             raise IndexError('Invalid movement (out of board).')
 
-        # Destination found
-        if self.board[start_x + dx][start_y] is None:
-            self.board[start_x + dx][start_y] = \
-                [self.board[start_x][start_y][0], n]
-            self.board[start_x][start_y][1] -= n
-            if self.board[start_x][start_y][1] == 0:
-                self.board[start_x][start_y] = None
-        elif self.has_same_color(start_x, start_y, start_x + dx, start_y):
-            self.board[start_x + dx][start_y][1] += n
-            self.board[start_x][start_y][1] -= n
-            if self.board[start_x][start_y][1] == 0:
-                self.board[start_x][start_y] = None
-        else:
-            raise IndexError('Invalid movemnet (opponent is present).')
+        # Destination found, but occupied by the opponent
+        if self.board[start_x + dx][start_y] is not None \
+                and not self.has_same_color(start_x, start_y, start_x + dx, start_y):
+            raise IndexError('Invalid movement (opponent is present).')
+
+        origin = self.board[start_x][start_y]
+        destination = self.board[start_x + dx][start_y]
+        self._set_cell(start_x + dx, start_y,
+                       [origin[0], n if destination is None
+                        else destination[1] + n])
+        self._set_cell(start_x, start_y,
+                       None if origin[1] == n else [origin[0], origin[1] - n])
 
     def move_vertically(self, start_x, start_y, n, dy):
         """
@@ -184,20 +359,19 @@ class Board:
         if not start_y + dy in range(0, Board.SIZE):
             raise IndexError('Invalid movement (out of board).')
 
-        # Destination found
-        if self.board[start_x][start_y + dy] is None:
-            self.board[start_x][start_y + dy] = [self.board[start_x][start_y][0], n]
-            self.board[start_x][start_y][1] -= n
-            if self.board[start_x][start_y][1] == 0:
-                self.board[start_x][start_y] = None
-        elif self.has_same_color(start_x, start_y, start_x, start_y + dy):
-            self.board[start_x][start_y + dy][1] += n
-            self.board[start_x][start_y][1] -= n
-            if self.board[start_x][start_y][1] == 0:
-                self.board[start_x][start_y] = None
-        else:
+        # Destination found, but occupied by the opponent
+        if self.board[start_x][start_y + dy] is not None \
+                and not self.has_same_color(start_x, start_y, start_x, start_y + dy):
             raise IndexError('Invalid movement (opponent is present).')
 
+        origin = self.board[start_x][start_y]
+        destination = self.board[start_x][start_y + dy]
+        self._set_cell(start_x, start_y + dy,
+                       [origin[0], n if destination is None
+                        else destination[1] + n])
+        self._set_cell(start_x, start_y,
+                       None if origin[1] == n else [origin[0], origin[1] - n])
+
     def classify_mark(self, num_of_pieces=True) -> dict:
         """
         Returns a dictionary consisting 2 keys: 'black', and 'white'.
@@ -208,29 +382,15 @@ class Board:
         (x_coord, y_coord) if num_of_pieces is True.
         :param num_of_pieces: whether number_of_pieces component should
         be added to the tuple.
+        The lists are read from the index of the stacks, in the
+        order of the coordinates.
         """
-        coords = {'white': [], 'black': []}
         if num_of_pieces:
-            for i in range(0, Board.SIZE):
-                for j in range(0, Board.SIZE):
-                    if self.board[i][j] is None:
-                        pass
-                    elif self.board[i][j][0] == 'white':
-                        coords['white'] \
-                            .append((self.board[i][j][1], i, j))
-                    elif self.board[i][j][0] == 'black':
-                        coords['black'] \
-                            .append((self.board[i][j][1], i, j))
-        else:
-            for i in range(0, Board.SIZE):
-                for j in range(0, Board.SIZE):
-                    if self.board[i][j] is None:
-                        pass
-                    elif self.board[i][j][0] == 'white':
-                        coords['white'].append((i, j))
-                    elif self.board[i][j][0] == 'black':
-                        coords['black'].append((i, j))
-        return coords
+            return {color: [(n, x, y) for ((x, y), n)
+                            in sorted(self.pieces[color].items())]
+                    for color in ('white', 'black')}
+        return {color: sorted(self.pieces[color])
+                for color in ('white', 'black')}
 
 
 class DistTools:
@@ -251,54 +411,20 @@ class DistTools:
         return sqrt((x1 - x2)**2 + (y1 - y2)**2)
 
 
-class Action:
-    """
-    Abstract class of a possible action that can be
-    applied to a Board. An object of this class
-    encapsulates the information on when the Player
-    makes a move (BOOM, or MOVE).
-    """
-    pass
-
-
-class Move(Action):
-    """
-    Encapsulates a MOVE action. To use this class, one must
-    supply two 2-tuples: origin=(x1,y1) and destination=(x2,y2).
-    """
-
-    def __init__(self, n, origin: tuple, destination: tuple):
-        self.n = n
-        self.origin = origin
-        self.destination = destination
-
-    def __str__(self):
-        return "MOVE {} from {} to {}.".format(self.n, self.origin, self.destination)
-
-
-class Boom(Action):
-    """
-    Encapsulates a BOOM action. To use this class, one must
-    supple one 2-tuples: origin=(x,y).
-    """
-
-    def __init__(self, origin: tuple):
-        self.origin = origin
-
-    def __str__(self) -> str:
-        return "BOOM at {}.".format(self.origin)
-
-
 class StateNode:
     """
     A graph node that contains a core value (which is
-    of type Board), and a list of adjacent nodes.
+    of type Board), and the node it was expanded from.
+    The adjacent nodes are not kept, so that the explored
+    tree can be freed as the search goes on.
     """
+    __slots__ = ('value', 'action_taken', 'parent', 'depth')
 
-    def __init__(self, board: Board, action_taken: Action):
+    def __init__(self, board: Board, action_taken: Action, parent=None):
         self.value = board
         self.action_taken = action_taken
-        self.next_states = set()
+        self.parent = parent
+        self.depth = 0 if parent is None else parent.depth + 1
 
     def __str__(self) -> str:
         return self.value.__str__()
@@ -315,6 +441,19 @@ class StateNode:
     def __hash__(self) -> int:
         return self.value.__hash__()
 
+    def path(self) -> list:
+        """
+        Returns the actions taken from the start state to this node,
+        by following the parents of the node.
+        """
+        actions = []
+        node = self
+        while node.parent is not None:
+            actions.append(node.action_taken)
+            node = node.parent
+        actions.reverse()
+        return actions
+
 
 class ArtificialPlayer:
     """
@@ -322,12 +461,100 @@ class ArtificialPlayer:
     the Board. A search algorithm is implemented in this agent.
     The agent also has information about the goal state.
     """
+    ENGINES = ('ids', 'ida', 'astar', 'wastar', 'beam')
+    # The maximum number of nodes between two calls of the stop function
+    # (and two checks of the time limit).
+    STOP_INTERVAL = 1024
+    # The time, in seconds, aimed at between two calls of the stop
+    # function: the number of nodes between them is adapted to the time
+    # the search takes per node (see interrupted).
+    STOP_PERIOD = 0.005
+    HEURISTICS = ('manhattan', 'admissible')
 
-    def __init__(self, data):
-        self.stack = deque()
-        self.start_state = StateNode(Board(data), None)
-        self.known_states = set()
+    def __init__(self, data, board_type=Board,
+                 table_size=TranspositionTable.DEFAULT_SIZE,
+                 table_policy='depth', vectorised=False,
+                 heuristic='manhattan', symmetry=False, cache=None,
+                 tablebase=None, stats=False):
+        """
+        :param data: the dictionary data type.
+        :param board_type: the board implementation used in the search,
+        either Board or bitboard.BitBoard.
+        :param table_size: the maximum number of entries of the
+        transposition table, or 0 to search without one.
+        :param table_policy: the replacement policy of the
+        transposition table, 'depth' or 'two-tier'.
+        :param vectorised: whether the next states are evaluated in
+        batches with NumPy by the best-first searches (see
+        expand_scored).
+        :param heuristic: the heuristic of the search, either 'manhattan'
+        (the default) or 'admissible' (see heuristic).
+        :param symmetry: whether the symmetric boards (rotated or
+        reflected) share their entries in the transposition table and
+        the closed sets (see state_key).
+        :param cache: the cache.SolutionCache checked before searching,
+        and updated after, or None.
+        :param tablebase: the tablebase.Tablebase probed by the searches,
+        or None (see probe).
+        :param stats: whether the statistics of the searches are collected
+        (see stats.SearchStats), at the cost of a slower search.
+        """
+        if heuristic not in ArtificialPlayer.HEURISTICS:
+            raise ValueError('Unknown heuristic: {}.'.format(heuristic))
+        if vectorised:
+            vectorised_module.require()
+        self.heuristic_kind = heuristic
+        self.symmetry = symmetry
+        self.cache = cache
+        self.tablebase = tablebase
+        # The (nodes, elapsed time) of the search that found the cached
+        # result returned by the last search, or None if not cached.
+        self.cache_hit = None
+        self.vectorised = vectorised
+        self.start_state = StateNode(board_type(data), None)
+        # The transposition table of the deepening searches, emptied by
+        # every search. The values are tagged with the search storing
+        # them, 'ids' or 'ida', whose entries mean different things.
+        self.table = TranspositionTable(table_size, table_policy) \
+            if table_size > 0 else None
         self.max_depth = 0
+        self.nodes = 0
+        # The bound of the current iteration: the depth in iterative
+        # deepening search, the bound on f in IDA*.
+        self.bound = 0
+        self.iterations = []
+        self.path = set()
+        # A function called every few nodes (at most STOP_INTERVAL): the
+        # search gives up as soon as it returns True (see interrupted).
+        self.stop = None
+        self.stopped = False
+        # The function checked by interrupted in the current search: the
+        # stop function, and the time budget (see search).
+        self.check = None
+        # The number of nodes between two calls of check, the nodes left
+        # before the next call, and the time of the last call.
+        self.stride = 1
+        self.clock = 1
+        self.checked = 0.0
+        # The nodes left in the node budget of the current search,
+        # checked at every node: the nodes of the iterations recorded so
+        # far are taken off (see record_iteration).
+        self.node_cap = inf
+        # The budget that stopped the last search, 'time-limit' or
+        # 'node-limit', or None.
+        self.limit = None
+        # With a budget, the (black pieces, heuristic, depth, actions) of
+        # the best node searched so far (see observe), and once the
+        # budget runs out, the node of its partial plan.
+        self.anytime = False
+        self.best = None
+        self.partial = None
+        # A function called with the player every progress_interval
+        # nodes, to report the progress of the search.
+        self.progress = None
+        self.progress_interval = ArtificialPlayer.STOP_INTERVAL
+        self.countdown = self.progress_interval
+        self.stats = SearchStats() if stats else None
 
     @staticmethod
     def goal_function(state: StateNode):
@@ -336,117 +563,611 @@ class ArtificialPlayer:
         if that state is a winning state.
         :param state: the state to be checked.
         """
-        return state.value.classify_mark().get('black') == []
+        return state.value.piece_count('black') == 0
 
     @staticmethod
-    def get_next_states(current_state: StateNode):
+    def order_actions(board, color='white') -> list:
         """
-        Determines all possible next states from a current state,
-        by applying the moving rules of the Expendibots game. This
+        Returns the legal actions of the player of the given color on
+        the board, most promising first: the booms that hit a piece of
+        the opponent, then the moves getting closer to the nearest
+        piece of the opponent, then the other booms, then the other
+        moves. The order is otherwise the one of movegen.legal_actions.
+        :param board: the board the actions are applied to.
+        :param color: the color of the player, 'white' or 'black'.
+        """
+        opponent = 'black' if color == 'white' else 'white'
+        targets = [x * Board.SIZE + y for (x, y)
+                   in board.classify_mark(num_of_pieces=False)[opponent]]
+        nearest = {}
+
+        def distance_to_targets(coord):
+            if coord not in nearest:
+                row = MANHATTAN[coord[0] * Board.SIZE + coord[1]]
+                nearest[coord] = min((row[target] for target in targets),
+                                     default=0)
+            return nearest[coord]
+
+        hit_squares = set()
+        for component in board.components():
+            if any(board.color_of(square) == opponent
+                   for square in component):
+                hit_squares.update(component)
+
+        def rank(action):
+            if isinstance(action, Boom):
+                return 0 if action.origin[0] * Board.SIZE + action.origin[1] \
+                    in hit_squares else 2
+            return 1 if distance_to_targets(action.destination) \
+                < distance_to_targets(action.origin) else 3
+
+        return sorted(legal_actions(board, color), key=rank)
+
+    @staticmethod
+    def get_next_states(current_state: StateNode, color='white'):
+        """
+        Yields all possible next states from a current state, one at a
+        time, by applying the moving rules of the Expendibots game. This
         includes moving the pieces up, down, left, right, and
         performing any possible boom action. This is a static method,
         therefore does NOT keep track of any previous states.
+        Only the legal actions are generated (see movegen), in the order
+        of order_actions, so that a search stopping early never builds
+        the remaining states. Each action is applied to, then undone
+        from, the board of the current state in place, and a copy of the
+        board is only made when the next state is asked for.
+        :param current_state: the current state to be expanded.
+        :param color: the color of the player acting, white by default
+        (the only player of the single-agent puzzle).
+        """
+        board = current_state.value
+        for action in ArtificialPlayer.order_actions(board, color):
+            undo_entry = action.apply_to(board)
+            next_state = StateNode(board.copy(), action, current_state)
+            board.unmake(undo_entry)
+            yield next_state
+
+    def expand(self, current_state: StateNode):
+        """
+        Returns the next states of a current state, for the depth first
+        searches: the states of get_next_states, generated lazily, so
+        that a search cut off early never builds the remaining states.
         :param current_state: the current state to be expanded.
         """
-        next_states = set()
-        all_whites = current_state.value.classify_mark()['white']
-        for white_pos in all_whites:
-            # Move in 4 directions, each time create a new state
-            for i in range(1, white_pos[0] + 1):
-                for j in range(-white_pos[0], white_pos[0] + 1):
-                    h_new_state = deepcopy(current_state.value)
-                    v_new_state = deepcopy(current_state.value)
-                    try:
-                        h_new_state.move_horizontally(white_pos[1],
-                                                      white_pos[2], abs(i), j)
-                    except IndexError:
-                        pass
-                    try:
-                        v_new_state.move_vertically(white_pos[1],
-                                                    white_pos[2], abs(i), j)
-                    except IndexError:
-                        pass
-                    if h_new_state != current_state.value:
-                        next_states.add(StateNode(h_new_state,
-                                                  Move(i,
-                                                       (white_pos[1], white_pos[2]),
-                                                       (white_pos[1] + j, white_pos[2]))))
-                    if v_new_state != current_state.value:
-                        next_states.add(StateNode(v_new_state,
-                                                  Move(i,
-                                                       (white_pos[1], white_pos[2]),
-                                                       (white_pos[1], white_pos[2] + j))))
-
-            # Boom, each time create a new state
-            b_new_state = deepcopy(current_state.value)
-            b_new_state.boom(white_pos[1], white_pos[2])
-            next_states.add(StateNode(b_new_state, Boom((white_pos[1], white_pos[2]))))
+        next_states = self.get_next_states(current_state)
+        if self.stats is not None:
+            next_states = self.stats.count(current_state, next_states)
         return next_states
 
-    @staticmethod
-    def heuristic(state: StateNode):
+    def expand_scored(self, current_state: StateNode):
+        """
+        Yields the (next state, heuristic) of the next states of a current
+        state, for the best-first searches, which keep all of them. By
+        default, the states are generated lazily, and the heuristic is
+        None: the search only evaluates the states it keeps. With the
+        vectorised option and the manhattan heuristic, all the next states
+        are built at once, their heuristics evaluated as one batch (see
+        vectorised), and they are ordered by the batch evaluation.
+        :param current_state: the current state to be expanded.
+        """
+        if not self.vectorised or self.heuristic_kind != 'manhattan':
+            for next_state in self.expand(current_state):
+                yield next_state, None
+            return
+        next_states = list(self.expand(current_state))
+        if not next_states:
+            return
+        evaluation = vectorised_module.evaluate(
+            [next_state.value for next_state in next_states])
+        if self.stats is not None:
+            self.stats.evaluations += len(next_states)
+        estimates = evaluation.heuristics.tolist()
+        for i in evaluation.order():
+            yield next_states[i], estimates[i]
+
+    def interrupted(self, check_now=False) -> bool:
+        """
+        Returns True if the search has been asked to stop. The node
+        budget is checked at every node, so it is never overrun. The stop
+        function and the time budget are checked once every stride nodes
+        (and at the end of every iteration, with check_now): the stride
+        starts at 1, and is adapted after every check so that the checks
+        are about STOP_PERIOD seconds apart (at most STOP_INTERVAL nodes),
+        whatever the time the search takes per node. Once stopped, the
+        search stays stopped until the next call of search. The progress
+        function is also called here, once every progress_interval nodes.
+        :param check_now: whether the stop function is called whatever
+        the number of nodes (the end of an iteration, not a node).
+        """
+        if self.progress is not None and not check_now:
+            self.countdown -= 1
+            if self.countdown <= 0:
+                self.countdown = self.progress_interval
+                self.progress(self)
+        if self.stopped:
+            return True
+        if self.nodes >= self.node_cap:
+            self.limit = 'node-limit'
+            self.stopped = True
+        elif self.check is not None:
+            if check_now:
+                self.stopped = self.check()
+                return self.stopped
+            self.clock -= 1
+            if self.clock <= 0:
+                self.stopped = self.check()
+                now = perf_counter()
+                elapsed = now - self.checked
+                stride = ArtificialPlayer.STOP_INTERVAL if elapsed <= 0 \
+                    else int(self.stride * ArtificialPlayer.STOP_PERIOD
+                             / elapsed)
+                self.stride = max(1, min(stride, 2 * self.stride,
+                                         ArtificialPlayer.STOP_INTERVAL))
+                self.clock = self.stride
+                self.checked = now
+        return self.stopped
+
+    def __budget__(self, time_limit, node_limit):
+        """
+        Returns the function checked by interrupted during a search: the
+        stop function, and unless None, the time budget of the search,
+        which also sets limit when it runs out. The node budget is set
+        up here too, as node_cap.
+        :param time_limit: the maximum time of the search in seconds.
+        :param node_limit: the maximum number of nodes searched.
+        """
+        self.node_cap = inf if node_limit is None else node_limit
+        self.stride = self.clock = 1
+        self.checked = perf_counter()
+        if time_limit is None:
+            return self.stop
+        stop = self.stop
+        deadline = self.checked + time_limit
+
+        def check():
+            if perf_counter() >= deadline:
+                self.limit = 'time-limit'
+            return self.limit is not None or (stop is not None and stop())
+
+        return check
+
+    def observe(self, state: StateNode, arena=None, index=None):
+        """
+        Keeps the state as the best partial plan of the search if it has
+        fewer black pieces left than the best one so far, or as many but
+        a lower heuristic (then a lower depth). Only called by the search
+        algorithms with a budget (see search).
+        :param state: the state searched.
+        :param arena: the engines.NodeArena holding the parents of the
+        state, if it has been detached from them.
+        :param index: the index of the state in the arena.
+        """
+        blacks = state.value.piece_count('black')
+        if blacks > self.best[0]:
+            return
+        rank = (blacks, self.heuristic(state), state.depth)
+        if rank < self.best[:3]:
+            self.best = rank + (state.path() if arena is None
+                                else arena.path(index),)
+
+    def probe(self, state: StateNode):
+        """
+        Returns the number of actions winning the game from the state
+        (inf if it cannot be won), read from the tablebase, or None if
+        there is no tablebase, or if the board has too many pieces.
+        :param state: the state probed.
+        """
+        if self.tablebase is None:
+            return None
+        return self.tablebase.probe(state.value)
+
+    def finish(self, state: StateNode, distance) -> StateNode:
+        """
+        Returns the goal node reached from the state by following the
+        tablebase: at each step, the first next state one action closer
+        to the win.
+        :param state: a state probed by the tablebase.
+        :param distance: the distance to win of the state (see probe).
+        """
+        while distance > 0:
+            state = next(next_state for next_state in self.get_next_states(state)
+                         if self.probe(next_state) == distance - 1)
+            distance -= 1
+        return state
+
+    def state_key(self, state: StateNode) -> int:
+        """
+        Returns the key of the board of a state, used by the
+        transposition table and the closed sets: its Zobrist key, or
+        with the symmetry option, the canonical key shared by its 8
+        symmetric boards. The search still only follows real actions,
+        so the paths found never need to be transformed back.
+        :param state: the state whose board is keyed.
+        """
+        if self.symmetry:
+            return canonical_key(state.value)
+        return state.value.key
+
+    def heuristic(self, state: StateNode):
         """
         Calculates the heuristic of a given state.
-        Formula: sum(total_whites_on_that_coord *
-                sum(manhattan_dist_to_all_blacks))
+        - 'manhattan': sum(total_whites_on_that_coord *
+        sum(manhattan_dist_to_all_blacks)), maintained incrementally
+        by the board. It is not admissible.
+        - 'admissible': a lower bound of the number of actions left,
+        from the black clusters still needing a boom and the jump
+        distances of the stacks (see heuristics.admissible_estimate).
         """
-        total = 0
-        coords = state.value.classify_mark()
-        for white in coords['white']:
-            for black in coords['black']:
-                total += white[0] * DistTools.manhattan((white[1], white[2]), (black[1], black[2]))
-        return total
+        if self.stats is not None:
+            self.stats.evaluations += 1
+        if self.heuristic_kind == 'admissible':
+            return admissible_estimate(state.value)
+        return state.value.heuristic_value
 
-    def __ids__(self, current_node: StateNode, going_deeper, threshold):
+    def __ids__(self, start_node: StateNode, depth, threshold):
         """
         The implementation of the iterative deepening depth first search,
-        with a simple heuristic supplied from the environment.
-        :param current_node: the node where the algorithm starts.
-        :param going_deeper: the cut-off depth remaining, the search stops
-        when this parameter reaches zero.
+        with a simple heuristic supplied from the environment. The search
+        keeps an explicit stack of frames (node, its key in the
+        transposition table, its remaining next states, the cut-off depth
+        remaining, and its heuristic value) instead of recursing once per
+        depth.
+        :param start_node: the node where the algorithm starts.
+        :param depth: the cut-off depth, the search stops when the remaining
+        depth reaches zero.
         :param threshold: the heuristic value, any node that has the heuristic
         value greater than the threshold is ignored.
+        :return: the goal node, or None if it is not reached.
         """
+        frames = []
+        node, going_deeper = start_node, depth
+        while True:
+            self.nodes += 1
+            if self.interrupted():
+                return None
 
-        # Goal reached, add final step to the stack.
-        if self.goal_function(current_node):
-            self.stack.append(current_node.action_taken)
-            return True
+            # Goal reached.
+            if self.goal_function(node):
+                return node
+            if self.anytime:
+                self.observe(node)
 
-        # Depth cut-off reached, or moving too faraway from the black pieces.
-        if going_deeper <= 0 or self.heuristic(current_node) > threshold:
-            return False
+            # Small enough for the tablebase: a leaf, either won within
+            # the remaining depth, or never expanded.
+            distance = self.probe(node)
+            if distance is not None and distance <= going_deeper:
+                return self.finish(node, distance)
 
-        # Not there yet, expanding next possible states and reduce
-        # the threshold (heuristic value)
-        current_node.next_states = self.get_next_states(current_node)
-        new_threshold = self.heuristic(current_node)
+            # Depth cut-off reached, or moving too faraway from the black
+            # pieces. Otherwise, unless it has already been searched at
+            # least this deep without success (once the node is within its
+            # threshold, the result only depends on the remaining depth),
+            # expanding next possible states and reduce the threshold.
+            estimate = self.heuristic(node)
+            if distance is None and going_deeper > 0 and estimate <= threshold:
+                key = None if self.table is None else self.state_key(node)
+                entry = None if key is None else self.table.probe(key)
+                if entry is None or entry[1][0] != 'ids' \
+                        or entry[0] < going_deeper:
+                    frames.append((node, key, iter(self.expand(node)),
+                                   going_deeper, estimate))
 
-        # Deepening the search algorithm
-        for next_state in current_node.next_states:
-            if self.__ids__(next_state, going_deeper - 1, new_threshold):
-                self.stack.append(current_node.action_taken)
-                # print(current_node.action_taken)
-                return True
-        return False
+            # Deepening the search algorithm, from the deepest frame
+            # which still has next states to try.
+            node = None
+            while frames:
+                parent_key, next_states, parent_going_deeper, \
+                    parent_estimate = frames[-1][1:]
+                node = next(next_states, None)
+                if node is not None:
+                    going_deeper = parent_going_deeper - 1
+                    threshold = parent_estimate
+                    break
+                frames.pop()
+                if self.table is not None:
+                    self.table.store(parent_key, parent_going_deeper,
+                                     ('ids', False))
+            if node is None:
+                return None
 
-    def start_searching(self, max_depth=250):
+    def __ida__(self, start_node: StateNode, bound, max_depth):
         """
-        Initialize the search algorithm implemented in the
-        Artificial Player. The maximum depth for this search
-        is set to 250 by default.
-        :param max_depth: the maximum depth allowed. If this
-        depth is reached, the search will stop, and assume
-        that the goal is unreachable.
+        The implementation of the iterative deepening A* search (IDA*),
+        a depth first search that prunes every node whose estimated
+        total cost f = g + h is greater than the bound. Like __ids__,
+        the search keeps an explicit stack of frames (node, its remaining
+        next states, the smallest f pruned below it, and its key in the
+        transposition table).
+        :param start_node: the node where the algorithm starts.
+        :param bound: the bound of the current iteration.
+        :param max_depth: the maximum depth allowed.
+        :return: the goal node (or None if it is not reached), and the
+        smallest f among the pruned nodes (the bound of the next iteration).
+        """
+        frames = []
+        node = start_node
+        while True:
+            cost = node.depth - start_node.depth
+            estimate = cost + self.heuristic(node)
+            result = None
+            if estimate > bound:
+                result = estimate
+            else:
+                self.nodes += 1
+                if self.interrupted():
+                    return None, inf
+
+                # Goal reached.
+                if self.goal_function(node):
+                    return node, bound
+                if self.anytime:
+                    self.observe(node)
+
+                # Small enough for the tablebase: a leaf, either won
+                # within the bound, or pruned with its exact f.
+                distance = self.probe(node)
+                if distance is not None \
+                        and cost + distance <= min(bound, max_depth):
+                    return self.finish(node, distance), bound
+
+                # Already searched with the same bound left, without
+                # success: the stored value is the smallest h that exceeded
+                # that bound left. With any other bound left, the smallest
+                # h pruned is unknown, and the node is searched again.
+                key = None if self.table is None else self.state_key(node)
+                entry = None if key is None else self.table.probe(key)
+                if cost >= max_depth:
+                    result = inf
+                elif distance is not None:
+                    result = cost + distance if cost + distance <= max_depth \
+                        else inf
+                elif entry is not None and entry[1][0] == 'ida' \
+                        and entry[0] == bound - cost:
+                    result = cost + entry[1][1]
+                else:
+                    self.path.add(node.value)
+                    frames.append([node, iter(self.expand(node)), inf, key])
+
+            # Going on from the deepest frame which still has next states
+            # to try. Boards already on the current path are not visited
+            # again.
+            node = None
+            while frames:
+                frame = frames[-1]
+                if result is not None:
+                    frame[2] = min(frame[2], result)
+                    result = None
+                for next_state in frame[1]:
+                    if next_state.value not in self.path:
+                        node = next_state
+                        break
+                if node is not None:
+                    break
+                frames.pop()
+                parent, parent_cost = frame[0], frame[0].depth - start_node.depth
+                self.path.discard(parent.value)
+                if self.table is not None:
+                    self.table.store(frame[3], bound - parent_cost,
+                                     ('ida', frame[2] - parent_cost))
+                result = frame[2]
+            if node is None:
+                return None, result
+
+    def __start_ids__(self, max_depth):
+        """
+        Runs the iterative deepening search, one iteration per depth.
+        :param max_depth: the maximum depth allowed.
+        :return: the goal node, or None if it is not reached.
         """
         depth = 0
         threshold = self.heuristic(self.start_state)
-        while self.__ids__(self.start_state, depth, threshold) is False:
+        while depth <= max_depth:
+            self.nodes = 0
+            self.bound = depth
+            if self.interrupted(check_now=True):
+                break
+            goal = self.__ids__(self.start_state, depth, threshold)
+            self.record_iteration(depth)
+            if goal is not None:
+                return goal
             depth += 1
-            if depth > max_depth:
-                print('Maximum depth of {} exceeded. Assume failure.'.format(max_depth))
+        return None
+
+    def __start_ida__(self, max_depth):
+        """
+        Runs the IDA* search, raising the bound of each iteration to
+        the smallest f that exceeded the bound of the previous one. The
+        search fails once an iteration prunes no node on its bound (the
+        next bound is inf), or with the admissible heuristic, once the
+        bound is greater than max_depth. Whatever the heuristic, it fails
+        at once if the admissible estimate of the start state is greater
+        than max_depth (see heuristics.admissible_estimate).
+        :param max_depth: the maximum depth allowed.
+        :return: the goal node, or None if it is not reached.
+        """
+        if admissible_estimate(self.start_state.value) > max_depth:
+            return None
+        bound = self.heuristic(self.start_state)
+        while bound < inf:
+            if self.heuristic_kind == 'admissible' and bound > max_depth:
                 break
-        if self.stack:
-            self.stack.pop()
-        while self.stack:
-            print(self.stack.pop())
+            self.nodes = 0
+            self.bound = bound
+            if self.interrupted(check_now=True):
+                break
+            self.path = set()
+            goal, next_bound = self.__ida__(self.start_state, bound, max_depth)
+            self.record_iteration(bound)
+            if goal is not None:
+                return goal
+            bound = next_bound
+        return None
+
+    def search(self, max_depth=250, engine='ids', weight=2.0, beam_width=64,
+               time_limit=None, node_limit=None):
+        """
+        Runs the chosen search algorithm from the start state.
+        :param max_depth: the maximum depth allowed. If this
+        depth is reached, the search will stop, and assume
+        that the goal is unreachable.
+        :param engine: the search algorithm, either 'ids' (iterative
+        deepening search), 'ida' (IDA*), or one of the best-first
+        searches of the engines module: 'astar' (A*), 'wastar'
+        (weighted A*) and 'beam' (beam search).
+        :param weight: the weight of the heuristic in weighted A*.
+        :param beam_width: the number of nodes kept at each depth
+        in beam search.
+        :param time_limit: the maximum time of the search in seconds,
+        or None.
+        :param node_limit: the maximum number of nodes searched, or None.
+        :return: the goal node, whose path is the winning action
+        sequence, or None if the goal is not reached (or the search
+        has been stopped, see interrupted).
+        With a budget (a time or node limit), the search is anytime: if
+        the budget runs out, limit tells which one, and partial is the
+        node of the best partial plan searched (the fewest black pieces
+        left, then the lowest heuristic, see observe).
+        The transposition table is emptied first, its entries depending
+        on the search algorithm and its bounds.
+        With a cache, a result already cached for the start state and
+        the same settings is returned without searching, and a new
+        result is cached, unless the search has been stopped.
+        """
+        self.stopped = False
+        self.cache_hit = None
+        self.limit = None
+        self.partial = None
+        self.iterations = []
+        self.countdown = self.progress_interval
+        if self.table is not None:
+            self.table.clear()
+        self.check = self.__budget__(time_limit, node_limit)
+        self.anytime = time_limit is not None or node_limit is not None
+        self.best = (inf, inf, inf, None)
+        if self.stats is not None:
+            self.stats.start(self)
+        if self.cache is None:
+            return self.__run_search__(max_depth, engine, weight, beam_width)
+
+        settings = '{} {} {}'.format(engine, self.heuristic_kind, max_depth)
+        if engine == 'wastar':
+            settings += ' {}'.format(weight)
+        elif engine == 'beam':
+            settings += ' {}'.format(beam_width)
+        # The options changing the order of the search, so its result or
+        # its number of nodes, are part of the settings too.
+        if self.symmetry:
+            settings += ' symmetry'
+        if self.tablebase is not None:
+            settings += ' tablebase-{}'.format(self.tablebase.budget)
+        if self.vectorised:
+            settings += ' vectorised'
+        board = self.start_state.value
+        cached = self.cache.lookup(board, settings)
+        if cached is not None:
+            actions, nodes, elapsed = cached
+            self.cache_hit = (nodes, elapsed)
+            return None if actions is None else self.replay(actions)
+        start = perf_counter()
+        goal = self.__run_search__(max_depth, engine, weight, beam_width)
+        if not self.stopped:
+            self.cache.store(board, settings,
+                             None if goal is None else goal.path(),
+                             sum(nodes for (_, nodes) in self.iterations),
+                             perf_counter() - start)
+        return goal
+
+    def __run_search__(self, max_depth, engine, weight, beam_width):
+        """
+        Runs the chosen search algorithm (see __run_engine__), then
+        completes the statistics and the partial plan of the search.
+        """
+        goal = self.__run_engine__(max_depth, engine, weight, beam_width)
+        if self.stats is not None:
+            self.stats.finish(self)
+        if goal is None and self.stopped and self.best[3] is not None:
+            self.partial = self.replay(self.best[3])
+        return goal
+
+    def __run_engine__(self, max_depth, engine, weight, beam_width):
+        """
+        Runs the chosen search algorithm from the start state
+        (see search for the parameters).
+        """
+        if engine == 'ids':
+            return self.__start_ids__(max_depth)
+        if engine == 'ida':
+            return self.__start_ida__(max_depth)
+        if engine == 'astar':
+            return engines.astar(self, max_depth=max_depth)
+        if engine == 'wastar':
+            return engines.astar(self, weight=weight, max_depth=max_depth)
+        if engine == 'beam':
+            return engines.beam_search(self, beam_width, max_depth=max_depth)
+        raise ValueError('Unknown search engine: {}.'.format(engine))
+
+    def record_iteration(self, bound):
+        """
+        Records the end of an iteration of the search: its bound (the
+        depth, or the bound on f) and its number of nodes.
+        :param bound: the bound of the iteration.
+        """
+        self.iterations.append((bound, self.nodes))
+        self.node_cap -= self.nodes
+        if self.stats is not None:
+            self.stats.end_iteration(bound, self.nodes)
+
+    def replay(self, actions) -> StateNode:
+        """
+        Returns the node reached by applying the actions one after the
+        other from the start state, each board being a new copy.
+        :param actions: the action sequence.
+        """
+        node = self.start_state
+        for action in actions:
+            board = node.value.copy()
+            action.apply_to(board)
+            node = StateNode(board, action, node)
+        return node
+
+    def start_searching(self, max_depth=250, engine='ids', verbose=False,
+                        weight=2.0, beam_width=64, time_limit=None,
+                        node_limit=None):
+        """
+        Initialize the search algorithm implemented in the
+        Artificial Player, and prints the winning action sequence
+        (or if a budget runs out, the best partial plan).
+        The maximum depth for this search is set to 250 by default.
+        See search for the parameters.
+        :param verbose: whether the bound and the number of nodes of
+        each iteration are printed, as comment lines starting with '#'.
+        """
+        goal = self.search(max_depth, engine, weight, beam_width,
+                           time_limit, node_limit)
+        if verbose:
+            for (i, (bound, nodes)) in enumerate(self.iterations):
+                print('# Iteration {}: bound {}, {} nodes.'.format(i, bound, nodes))
+            if self.table is not None and engine in ('ids', 'ida'):
+                print('# {}'.format(self.table))
+            if self.cache_hit is not None:
+                print('# Cached result: {} nodes, {:.3f}s when searched.'
+                      .format(*self.cache_hit))
+            if self.cache is not None:
+                print('# {}'.format(self.cache))
+            if self.tablebase is not None:
+                print('# {}'.format(self.tablebase))
+        if self.stats is not None:
+            for line in self.stats.report():
+                print('# {}'.format(line))
+        if goal is None and self.partial is not None:
+            print('{} reached. Best partial plan, {} black pieces left:'
+                  .format('Time limit' if self.limit == 'time-limit'
+                          else 'Node limit' if self.limit == 'node-limit'
+                          else 'Search stopped',
+                          self.partial.value.piece_count('black')))
+            goal = self.partial
+        elif goal is None:
+            print('Maximum depth of {} exceeded. Assume failure.'.format(max_depth))
+            return
+        for action in goal.path():
+            print(action)
@@ -0,0 +1,196 @@
+#!/usr/bin/env python
+
+"""
+File: batch.py
+Contains the batch mode of the solver: many boards, read from json
+files (a directory, a glob pattern) or from JSON lines, are solved by
+one long-lived process (or a pool of worker processes), and one JSON
+result is written per line as soon as each board is solved.
+Note: this file currently follows Python 3.7 syntax.
+"""
+
+from .artifacts import ArtificialPlayer
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from glob import glob
+from time import perf_counter
+import json
+import os
+import sys
+
+__author__ = 'Natural Stupidity'
+__copyright__ = '© 2020 Natural Stupidity, Expendibots Game'
+__version__ = '1.0'
+__email__ = 'b.tran17@student.unimelb.edu.au'
+
+STATUSES = ('solved', 'failed', 'time-limit', 'node-limit', 'error')
+
+
+def _read_json_lines(lines, name):
+    """
+    Yields the (puzzle_id, data, error) of every non-empty line of a
+    JSON lines stream, the id being name:line_number.
+    """
+    for (number, line) in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        puzzle_id = '{}:{}'.format(name, number)
+        try:
+            yield puzzle_id, json.loads(line), None
+        except ValueError as error:
+            yield puzzle_id, None, str(error)
+
+
+def _read_json_file(path):
+    """
+    Yields the (puzzle_id, data, error) of a json file, the id being
+    its path.
+    """
+    try:
+        with open(path) as file:
+            data = json.load(file)
+    except (OSError, ValueError) as error:
+        yield path, None, str(error)
+        return
+    yield path, data, None
+
+
+def iter_puzzles(sources):
+    """
+    Yields the (puzzle_id, data, error) of every board of the sources,
+    one at a time, so that a long stream is never read at once. The
+    data is None, and error the reason, if a board cannot be read.
+    :param sources: a list of directories (all their .json files, in
+    the order of their names), JSON lines files (.jsonl, or '-' for the
+    standard input, one board per line), or json files and glob
+    patterns matching them.
+    """
+    for source in sources:
+        if source == '-':
+            yield from _read_json_lines(sys.stdin, 'stdin')
+        elif os.path.isdir(source):
+            for path in sorted(glob(os.path.join(source, '*.json'))):
+                yield from _read_json_file(path)
+        elif source.endswith('.jsonl'):
+            try:
+                with open(source) as file:
+                    yield from _read_json_lines(file, source)
+            except OSError as error:
+                yield source, None, str(error)
+        else:
+            paths = sorted(glob(source))
+            if not paths:
+                yield source, None, 'No such file.'
+            for path in paths:
+                yield from _read_json_file(path)
+
+
+def solve(puzzle_id, data, options, search_args, time_limit=None,
+          node_limit=None) -> dict:
+    """
+    Solves one board, and returns its result: the puzzle id, the status
+    (one of STATUSES), the winning actions (in the format of the
+    referee, see Action.to_tuple), the number of nodes searched and the
+    elapsed time in seconds (and cached: True if the result comes from
+    the cache of the ArtificialPlayer, the number of nodes being then
+    those of the search that found it, and stats: its statistics, see
+    SearchStats.to_dict, if it collects them). If a limit is reached,
+    the result also holds the best partial plan, under partial, and
+    the number of black pieces it leaves, under blacks_left. If the
+    search raises an error, the status is error, and the result holds
+    the error, under error.
+    :param puzzle_id: the id of the board in the results.
+    :param data: the dictionary data type of the board.
+    :param options: the keyword arguments of the ArtificialPlayer.
+    :param search_args: the keyword arguments of ArtificialPlayer.search.
+    :param time_limit: the maximum time of the search in seconds, or None.
+    :param node_limit: the maximum number of nodes searched, or None.
+    """
+    start = perf_counter()
+    result = {'id': puzzle_id, 'status': 'error', 'actions': None,
+              'nodes': 0, 'elapsed': 0.0}
+    try:
+        player = ArtificialPlayer(data, **options)
+        goal = player.search(time_limit=None if time_limit is None
+                             else time_limit - (perf_counter() - start),
+                             node_limit=node_limit, **search_args)
+        result['nodes'] = sum(n for (_, n) in player.iterations)
+        if player.cache_hit is not None:
+            result['nodes'] = player.cache_hit[0]
+            result['cached'] = True
+        if player.stats is not None:
+            result['stats'] = player.stats.to_dict()
+        if goal is not None:
+            result['status'] = 'solved'
+            result['actions'] = [action.to_tuple() for action in goal.path()]
+        else:
+            result['status'] = player.limit or 'failed'
+            if player.partial is not None:
+                result['partial'] = [action.to_tuple()
+                                     for action in player.partial.path()]
+                result['blacks_left'] = \
+                    player.partial.value.piece_count('black')
+    except Exception as error:
+        # Any error of one board (an invalid board, an error of the cache,
+        # no memory left...) is its result, the other boards are solved.
+        result['status'] = 'error'
+        result['error'] = '{}: {}'.format(type(error).__name__, error)
+    result['elapsed'] = round(perf_counter() - start, 6)
+    return result
+
+
+def _unreadable(puzzle_id, error) -> dict:
+    """
+    Returns the result of a board that cannot be read.
+    """
+    return {'id': puzzle_id, 'status': 'error', 'actions': None,
+            'nodes': 0, 'elapsed': 0.0, 'error': error}
+
+
+def run_batch(sources, options, search_args, workers=1, time_limit=None,
+              node_limit=None, output=sys.stdout) -> dict:
+    """
+    Solves every board of the sources (see iter_puzzles), and writes one
+    JSON result per line (see solve) to the output, in the order the
+    boards are solved. With more than one worker, the boards are solved
+    by a pool of worker processes, at most two boards per worker being
+    read ahead.
+    :param sources: the directories, files, glob patterns or '-'.
+    :param options: the keyword arguments of the ArtificialPlayer.
+    :param search_args: the keyword arguments of ArtificialPlayer.search.
+    :param workers: the number of worker processes (1: no pool).
+    :param time_limit: the maximum time of each search in seconds.
+    :param node_limit: the maximum number of nodes of each search.
+    :param output: the stream the results are written to.
+    :return: the number of boards of each status.
+    """
+    counts = dict.fromkeys(STATUSES, 0)
+
+    def write(result):
+        counts[result['status']] += 1
+        output.write(json.dumps(result) + '\n')
+        output.flush()
+
+    if workers <= 1:
+        for (puzzle_id, data, error) in iter_puzzles(sources):
+            write(_unreadable(puzzle_id, error) if data is None
+                  else solve(puzzle_id, data, options, search_args,
+                             time_limit, node_limit))
+        return counts
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        for (puzzle_id, data, error) in iter_puzzles(sources):
+            if data is None:
+                write(_unreadable(puzzle_id, error))
+                continue
+            pending.add(executor.submit(solve, puzzle_id, data, options,
+                                        search_args, time_limit, node_limit))
+            if len(pending) >= 2 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    write(future.result())
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                write(future.result())
+    return counts
@@ -0,0 +1,361 @@
+#!/usr/bin/env python
+
+"""
+File: bench.py
+Contains the benchmark of the solver: every configuration of the
+ArtificialPlayer is run on the bundled boards (test-*.json) and on
+seeded random boards (see generator), each run in its own process, so
+that its peak memory can be measured. The results are written to a json
+file, and can be compared with the results of a previous run (the
+baseline). The sweep mode measures the engines on the boards of a sweep
+of one parameter of the generator, such as the number of black pieces,
+and reports their scaling curves.
+Note: this file currently follows Python 3.7 syntax.
+Usage: python -m search.bench [--output FILE] [--compare BASELINE]
+       python -m search.bench --sweep blacks --values 2 4 6 8
+"""
+
+from .artifacts import Board
+from .batch import solve
+from .bitboard import BitBoard
+from .generator import add_arguments, generate_many, sweep_cases
+from glob import glob
+from statistics import median
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+__author__ = 'Natural Stupidity'
+__copyright__ = '© 2020 Natural Stupidity, Expendibots Game'
+__version__ = '1.0'
+__email__ = 'b.tran17@student.unimelb.edu.au'
+
+# The configurations benchmarked by default: the keyword arguments of
+# ArtificialPlayer (bitboard selecting the BitBoard) and of its search.
+CONFIGS = {
+    'ids': {'engine': 'ids'},
+    'ids-bitboard': {'engine': 'ids', 'bitboard': True},
+    'ida': {'engine': 'ida'},
+    'ida-admissible': {'engine': 'ida', 'heuristic': 'admissible'},
+    'astar': {'engine': 'astar'},
+    'astar-admissible': {'engine': 'astar', 'heuristic': 'admissible'},
+    'wastar': {'engine': 'wastar'},
+    'beam': {'engine': 'beam'},
+}
+# The parameters of the generator, by their name on the command line.
+GENERATOR_ARGS = {'whites': 'num_whites', 'blacks': 'num_blacks',
+                  'cluster': 'cluster_density'}
+SEARCH_ARGS = ('engine', 'weight', 'beam_width', 'max_depth')
+PLAYER_ARGS = ('table_size', 'table_policy', 'vectorised', 'heuristic',
+               'symmetry')
+# The statuses of the searches that ran to the end, whose numbers of
+# nodes do not depend on the machine.
+DETERMINISTIC = ('solved', 'failed')
+# The number of runs of every search: the fastest one is kept.
+REPEAT = 5
+# The smallest increases of time (in seconds) and of peak memory (in KiB)
+# reported as regressions, whatever the tolerance: smaller ones are
+# within the noise of the measures.
+MIN_ELAPSED = 0.05
+MIN_PEAK_RSS_KIB = 1024
+
+
+def bundled_cases() -> list:
+    """
+    Returns the (case id, data) of the boards shipped with the solver.
+    """
+    directory = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    cases = []
+    for path in sorted(glob(os.path.join(directory, 'test-*.json'))):
+        with open(path) as file:
+            cases.append((os.path.basename(path), json.load(file)))
+    return cases
+
+
+def run_case(case_id, data, config, time_limit=None, node_limit=None) -> dict:
+    """
+    Runs one configuration on one board, in this process, and returns
+    the result of batch.solve, with the configuration, the number of
+    nodes per second, the length of the solution and the peak resident
+    memory of the process in KiB (None if it cannot be measured).
+    :param case_id: the id of the board.
+    :param data: the dictionary data type of the board.
+    :param config: the configuration, see CONFIGS.
+    :param time_limit: the maximum time of the search in seconds.
+    :param node_limit: the maximum number of nodes searched.
+    """
+    options = {name: config[name] for name in PLAYER_ARGS if name in config}
+    options['board_type'] = BitBoard if config.get('bitboard') else Board
+    search_args = {name: config[name] for name in SEARCH_ARGS if name in config}
+    result = solve(case_id, data, options, search_args, time_limit, node_limit)
+    result['length'] = None if result['actions'] is None \
+        else len(result['actions'])
+    del result['actions']
+    result.pop('partial', None)
+    result['nodes_per_second'] = round(result['nodes'] / result['elapsed']) \
+        if result['elapsed'] > 0 else None
+    result['peak_rss_kib'] = None if resource is None \
+        else resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return result
+
+
+def run_in_subprocess(case_id, data, config, time_limit=None,
+                      node_limit=None) -> dict:
+    """
+    Runs run_case in a new Python process, so that the peak memory
+    measured is the one of this case only.
+    """
+    request = json.dumps({'id': case_id, 'data': data, 'config': config,
+                          'time_limit': time_limit, 'node_limit': node_limit})
+    completed = subprocess.run([sys.executable, '-m', 'search.bench',
+                                '--run-case'],
+                               input=request, stdout=subprocess.PIPE,
+                               universal_newlines=True,
+                               cwd=os.path.dirname(os.path.dirname(
+                                   os.path.abspath(__file__))))
+    if completed.returncode != 0:
+        return {'id': case_id, 'status': 'error', 'nodes': 0, 'elapsed': 0.0,
+                'error': 'exit code {}'.format(completed.returncode)}
+    return json.loads(completed.stdout)
+
+
+def run_benchmark(cases, configs, time_limit=None, node_limit=None,
+                  isolate=True, verbose=False, repeat=REPEAT) -> dict:
+    """
+    Runs every configuration on every board, and returns the benchmark:
+    the platform, the limits, and one result per (board, configuration):
+    the result of the fastest of its runs, with the smallest peak memory
+    of the runs. The runs of a search are spread over the benchmark (all
+    the searches are run once, then again), so that a slow period of the
+    machine does not slow down all of them. A search stopped by a limit
+    is not run again: its time is the limit.
+    :param cases: the (case id, data) of the boards.
+    :param configs: the configurations by name, see CONFIGS.
+    :param time_limit: the maximum time of each search in seconds.
+    :param node_limit: the maximum number of nodes of each search.
+    :param isolate: whether each run has its own process.
+    :param verbose: whether each result is printed when done.
+    :param repeat: the number of runs of each search.
+    """
+    run = run_in_subprocess if isolate else run_case
+    runs = {}
+    for i in range(0, max(1, repeat)):
+        for (case_id, data) in cases:
+            for (name, config) in configs.items():
+                if i > 0 and runs[(case_id, name)][0]['status'] \
+                        not in DETERMINISTIC:
+                    continue
+                result = run(case_id, data, config, time_limit, node_limit)
+                runs.setdefault((case_id, name), []).append(result)
+    results = []
+    for (case_id, _) in cases:
+        for name in configs:
+            result = min(runs[(case_id, name)],
+                         key=lambda each: (each['status'] == 'error',
+                                           each['elapsed']))
+            memory = [each['peak_rss_kib'] for each in runs[(case_id, name)]
+                      if each.get('peak_rss_kib') is not None]
+            if memory:
+                result['peak_rss_kib'] = min(memory)
+            result['runs'] = len(runs[(case_id, name)])
+            result['config'] = name
+            results.append(result)
+            if verbose:
+                print('# {} {}: {}, {} nodes, {:.3f}s.'.format(
+                    case_id, name, result['status'], result['nodes'],
+                    result['elapsed']), file=sys.stderr)
+    return {'python': platform.python_version(),
+            'machine': platform.machine(),
+            'time_limit': time_limit,
+            'node_limit': node_limit,
+            'results': results}
+
+
+def compare(baseline, current, tolerance=0.2) -> list:
+    """
+    Returns the regressions of the current benchmark against the
+    baseline, as messages: a board no longer solved, a longer solution,
+    or a number of nodes, a time (or peak memory) greater than the
+    baseline by more than the tolerance. The nodes and the times are
+    only compared when both searches ran to the end (solved or failed):
+    a search stopped by a limit has the time of the limit, and nodes
+    depending on the speed of the machine. The time and the memory must
+    also be greater by at least MIN_ELAPSED and MIN_PEAK_RSS_KIB, the
+    noise of a measure.
+    :param baseline: the benchmark of reference.
+    :param current: the benchmark compared.
+    :param tolerance: the relative increase of nodes, time and memory
+    allowed.
+    """
+    reference = {(result['id'], result['config']): result
+                 for result in baseline['results']}
+    regressions = []
+    for result in current['results']:
+        old = reference.get((result['id'], result['config']))
+        if old is None:
+            continue
+        name = '{} {}'.format(result['id'], result['config'])
+        if old['status'] == 'solved' and result['status'] != 'solved':
+            regressions.append('{}: {} instead of solved.'
+                               .format(name, result['status']))
+            continue
+        if result.get('length') is not None and old.get('length') is not None \
+                and result['length'] > old['length']:
+            regressions.append('{}: solution of {} actions instead of {}.'
+                               .format(name, result['length'], old['length']))
+        finished = result['status'] == old['status'] in DETERMINISTIC
+        if finished and result['nodes'] > old['nodes'] * (1 + tolerance):
+            regressions.append('{}: {} nodes instead of {}.'
+                               .format(name, result['nodes'], old['nodes']))
+        for (field, unit, noise) in (('elapsed', 's', MIN_ELAPSED),
+                                     ('peak_rss_kib', ' KiB',
+                                      MIN_PEAK_RSS_KIB)):
+            if field == 'elapsed' and not finished:
+                continue
+            if result.get(field) is not None and old.get(field) \
+                    and result[field] > old[field] * (1 + tolerance) \
+                    and result[field] > old[field] + noise:
+                regressions.append('{}: {}{} instead of {}{}.'.format(
+                    name, result[field], unit, old[field], unit))
+    return regressions
+
+
+def curves(sweep, benchmark) -> list:
+    """
+    Returns the scaling curves of a sweep: for every value of the
+    parameter swept and every configuration, the number of boards
+    solved, and the median number of nodes and median time of the
+    searches (unsolved ones included, so that a curve stops rising at
+    the limits of the searches).
+    :param sweep: the (value, boards) of the sweep, see sweep_cases.
+    :param benchmark: the benchmark of all the boards of the sweep.
+    """
+    results = {}
+    for result in benchmark['results']:
+        results.setdefault((result['id'], result['config']), result)
+    configs = []
+    for result in benchmark['results']:
+        if result['config'] not in configs:
+            configs.append(result['config'])
+    points = []
+    for (value, cases) in sweep:
+        for config in configs:
+            runs = [results[(case_id, config)] for (case_id, _) in cases]
+            points.append({
+                'value': value,
+                'config': config,
+                'boards': len(runs),
+                'solved': sum(run['status'] == 'solved' for run in runs),
+                'median_nodes': median(run['nodes'] for run in runs),
+                'median_elapsed': round(median(run['elapsed']
+                                               for run in runs), 6)})
+    return points
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog='search.bench',
+        description='Benchmarks the solver on the bundled and random boards.')
+    parser.add_argument('--output', default=None,
+                        help='the json file the benchmark is written to '
+                             '(default: the standard output).')
+    parser.add_argument('--compare', metavar='BASELINE', default=None,
+                        help='a benchmark written before: the regressions '
+                             'are printed, and the exit status is 1 if any.')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='the relative increase of nodes, time and '
+                             'memory allowed by --compare (default 0.2).')
+    parser.add_argument('--repeat', type=int, default=REPEAT,
+                        help='the number of runs of every search, the '
+                             'fastest being kept (default {}).'
+                        .format(REPEAT))
+    parser.add_argument('--configs', nargs='+', choices=sorted(CONFIGS),
+                        default=sorted(CONFIGS),
+                        help='the configurations run (default: all).')
+    parser.add_argument('--random', type=int, default=10,
+                        help='the number of random boards (default 10).')
+    add_arguments(parser)
+    parser.add_argument('--sweep', choices=sorted(GENERATOR_ARGS),
+                        default=None,
+                        help='measures the scaling curves of the engines on '
+                             'random boards, the parameter of the generator '
+                             'taking each of --values.')
+    parser.add_argument('--values', type=float, nargs='+', default=None,
+                        help='the values of the parameter swept.')
+    parser.add_argument('--samples', type=int, default=5,
+                        help='the number of random boards of every value '
+                             'swept (default 5).')
+    parser.add_argument('--time-limit', type=float, default=10.0,
+                        help='the maximum time of each search, in seconds '
+                             '(default 10).')
+    parser.add_argument('--node-limit', type=int, default=None,
+                        help='the maximum number of nodes of each search.')
+    parser.add_argument('--no-isolation', action='store_true',
+                        help='run every search in this process (the peak '
+                             'memory is then the one of the whole run).')
+    parser.add_argument('--run-case', action='store_true',
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_case:
+        request = json.load(sys.stdin)
+        print(json.dumps(run_case(request['id'], request['data'],
+                                  request['config'], request['time_limit'],
+                                  request['node_limit'])))
+        return
+
+    params = {'num_whites': args.whites, 'num_blacks': args.blacks,
+              'heights': args.heights, 'cluster_density': args.cluster}
+    try:
+        if args.sweep is None:
+            cases = bundled_cases() + generate_many(args.random, args.seed,
+                                                    **params)
+        else:
+            if not args.values:
+                parser.error('--sweep needs --values.')
+            parameter = GENERATOR_ARGS[args.sweep]
+            values = args.values if parameter == 'cluster_density' \
+                else [int(value) for value in args.values]
+            sweep = sweep_cases(parameter, values, args.samples, args.seed,
+                                **params)
+            cases = [case for (_, boards) in sweep for case in boards]
+    except ValueError as error:
+        parser.error(str(error))
+    benchmark = run_benchmark(cases, {name: CONFIGS[name]
+                                      for name in args.configs},
+                              args.time_limit, args.node_limit,
+                              isolate=not args.no_isolation, verbose=True,
+                              repeat=args.repeat)
+    if args.sweep is not None:
+        benchmark['sweep'] = {'parameter': args.sweep,
+                              'curves': curves(sweep, benchmark)}
+        for point in benchmark['sweep']['curves']:
+            print('# {}={} {}: {}/{} solved, median {} nodes, {:.3f}s.'.format(
+                args.sweep, point['value'], point['config'], point['solved'],
+                point['boards'], point['median_nodes'],
+                point['median_elapsed']), file=sys.stderr)
+    if args.output is None:
+        print(json.dumps(benchmark, indent=1))
+    else:
+        with open(args.output, 'w') as file:
+            json.dump(benchmark, file, indent=1)
+
+    if args.compare is not None:
+        with open(args.compare) as file:
+            regressions = compare(json.load(file), benchmark, args.tolerance)
+        for regression in regressions:
+            print('Regression: {}'.format(regression), file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,443 @@
+#!/usr/bin/env python
+
+"""
+File: bitboard.py
+Contains a bitboard implementation of the Expendibots board.
+The squares are numbered as (x * 8 + y), so that the square (x, y)
+is the bit (x * 8 + y) of a 64-bit integer.
+Note: this file currently follows Python 3.7 syntax.
+"""
+
+from .heuristics import NO_DISTANCES, add_black, black_contribution, \
+    white_contribution
+from .util import print_board as util_print_board
+from .zobrist import stack_key
+
+__author__ = 'Natural Stupidity'
+__copyright__ = '© 2020 Natural Stupidity, Expendibots Game'
+__version__ = '1.0'
+__email__ = 'b.tran17@student.unimelb.edu.au'
+
+FULL_MASK = (1 << 64) - 1
+# Squares which are not on the edge y = 0 (resp. y = 7) of the board.
+NOT_Y0_MASK = int('fe' * 8, 16)
+NOT_Y7_MASK = int('7f' * 8, 16)
+
+
+def square_of(x, y) -> int:
+    """
+    Returns the square index of the coordinate (x, y).
+    """
+    return x * BitBoard.SIZE + y
+
+
+def coord_of(square) -> tuple:
+    """
+    Returns the coordinate (x, y) of the given square index.
+    """
+    return divmod(square, BitBoard.SIZE)
+
+
+def iter_squares(mask):
+    """
+    Yields the square indexes of all bits set in the mask,
+    in ascending order.
+    :param mask: a 64-bit occupancy mask.
+    """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def dilate(mask) -> int:
+    """
+    Returns the mask grown by one square in all 8 directions.
+    :param mask: a 64-bit occupancy mask.
+    """
+    mask |= ((mask & NOT_Y7_MASK) << 1) | ((mask & NOT_Y0_MASK) >> 1)
+    mask |= (mask << 8) | (mask >> 8)
+    return mask & FULL_MASK
+
+
+class BitBoard:
+    """
+    Represents a board of the game, with the same interface as
+    artifacts.Board. Instead of a 8 x 8 matrix, the board is stored
+    as one 64-bit occupancy mask per color, plus a 64-byte array of
+    stack heights. Copying, comparing and hashing a BitBoard are
+    therefore only a few integer operations, as the Zobrist key of
+    the board is updated incrementally by every action, like the
+    value of the heuristic of the ArtificialPlayer.
+    """
+    SIZE = 8
+    SIZE_INDEX = SIZE - 1
+    __slots__ = ('white', 'black', 'heights', 'key', 'counts',
+                 'black_distances', 'heuristic_value', '_components')
+
+    def __init__(self, data):
+        """
+        :param data: the dictionary data type.
+        """
+        self.white = 0
+        self.black = 0
+        self.heights = bytearray(BitBoard.SIZE * BitBoard.SIZE)
+        self.key = 0
+        self.counts = {'white': 0, 'black': 0}
+        self.black_distances = NO_DISTANCES
+        self.heuristic_value = 0
+        self._components = None
+        for color in ('white', 'black'):
+            for pile in data[color]:
+                self._place(color, square_of(pile[1], pile[2]), pile[0])
+                self.counts[color] += pile[0]
+
+    def copy(self):
+        """
+        Returns an independent copy of the instance.
+        """
+        other = BitBoard.__new__(BitBoard)
+        other.white = self.white
+        other.black = self.black
+        other.heights = bytearray(self.heights)
+        other.key = self.key
+        other.counts = dict(self.counts)
+        other.black_distances = self.black_distances
+        other.heuristic_value = self.heuristic_value
+        other._components = self._components
+        return other
+
+    def __copy__(self):
+        return self.copy()
+
+    def __deepcopy__(self, memo):
+        return self.copy()
+
+    def __str__(self) -> str:
+        return self.to_matrix().__str__()
+
+    def __eq__(self, o: object) -> bool:
+        return isinstance(o, BitBoard) \
+               and self.key == o.key \
+               and self.white == o.white \
+               and self.black == o.black \
+               and self.heights == o.heights
+
+    def __ne__(self, o: object) -> bool:
+        return not self.__eq__(o)
+
+    def __hash__(self) -> int:
+        return self.key
+
+    def _place(self, color, square, n):
+        """
+        Puts a stack of n pieces of the given color on an empty square.
+        """
+        if color == 'white':
+            self.white |= 1 << square
+        else:
+            self.black |= 1 << square
+        self.heights[square] = n
+        self.key ^= stack_key(color, square, n)
+        if color == 'white':
+            self.heuristic_value += white_contribution(
+                self.black_distances, square, n)
+        else:
+            self._add_black_estimate(square, 1)
+
+    def _add_black_estimate(self, square, sign):
+        """
+        Updates the heuristic value, and the distances to the black
+        stacks, when a black stack is added to (sign = 1) or removed
+        from (sign = -1) the square.
+        """
+        self.black_distances = add_black(self.black_distances, square, sign)
+        self.heuristic_value += sign * black_contribution(
+            [(white, self.heights[white]) for white in iter_squares(self.white)],
+            square)
+
+    def color_of(self, square):
+        """
+        Returns the color of the stack on the square, or None
+        if the square is empty.
+        """
+        bit = 1 << square
+        if self.white & bit:
+            return 'white'
+        if self.black & bit:
+            return 'black'
+        return None
+
+    def piece_count(self, color) -> int:
+        """
+        Returns the number of pieces of the given color on the board.
+        :param color: 'white' or 'black'.
+        """
+        return self.counts[color]
+
+    def to_matrix(self) -> list:
+        """
+        Converts the instance to the 8 x 8 matrix used by
+        artifacts.Board.
+        """
+        matrix = [[None for j in range(0, BitBoard.SIZE)]
+                  for i in range(0, BitBoard.SIZE)]
+        for color, mask in (('white', self.white), ('black', self.black)):
+            for square in iter_squares(mask):
+                x, y = coord_of(square)
+                matrix[x][y] = [color, self.heights[square]]
+        return matrix
+
+    def to_printable_dict(self) -> dict:
+        """
+        Converts the instance to a dictionary, which
+        can then be used in the util.print_board method.
+        """
+        printable_dict = {}
+        for color, mask in (('white', self.white), ('black', self.black)):
+            for square in iter_squares(mask):
+                printable_dict[coord_of(square)] = \
+                    [color, self.heights[square]]
+        return printable_dict
+
+    def print_board(self):
+        """
+        Applies the util.print_board method to the instance.
+        """
+        util_print_board(board_dict=self.to_printable_dict(),
+                         message=self.__hash__(),
+                         compact=False)
+
+    def has_same_color(self, x1, y1, x2, y2):
+        """
+        Returns true if the two stacks at the given coordinates
+        contain pieces having the same color.
+        :param x1: the x-coordinate of stack 1.
+        :param y1: the y-coordinate of stack 1.
+        :param x2: the x-coordinate of stack 2.
+        :param y2: the y-coordinate of stack 2.
+        """
+        return self.color_of(square_of(x1, y1)) \
+            == self.color_of(square_of(x2, y2))
+
+    def _explosion_of(self, square) -> int:
+        """
+        Returns the mask of all stacks reached by an explosion
+        starting at the given square. The exploded region is grown
+        one square in all 8 directions at a time, until it stops
+        reaching new stacks.
+        """
+        occupied = self.white | self.black
+        region = (1 << square) & occupied
+        while region:
+            grown = dilate(region) & occupied
+            if grown == region:
+                break
+            region = grown
+        return region
+
+    def components(self) -> list:
+        """
+        Returns the 8-connected groups of stacks on the board, as
+        tuples of square indexes (x * 8 + y). A boom at any stack of a
+        group removes exactly that group. The result is cached until
+        the board is changed.
+        """
+        if self._components is None:
+            components = []
+            remaining = self.white | self.black
+            while remaining:
+                low = remaining & -remaining
+                region = self._explosion_of(low.bit_length() - 1)
+                components.append(tuple(iter_squares(region)))
+                remaining &= ~region
+            self._components = components
+        return self._components
+
+    def boom(self, start_x, start_y) -> set:
+        """
+        Initiates an EXPLOSION with a starting point.
+        An explosion (or boom action) follows the rules of
+        the Expendibots game.
+        :param start_x: the x-coordinate of the starting point
+        :param start_y: the y-coordinate of the starting point.
+        :return: the set of coordinates of the removed stacks.
+        """
+        region = self._explosion_of(square_of(start_x, start_y))
+        self._remove(region)
+        return {coord_of(square) for square in iter_squares(region)}
+
+    def _remove(self, region):
+        """
+        Removes all stacks in the given region from the board.
+        """
+        for square in iter_squares(region & self.white):
+            self.key ^= stack_key('white', square, self.heights[square])
+            self.counts['white'] -= self.heights[square]
+            self.heuristic_value -= white_contribution(
+                self.black_distances, square, self.heights[square])
+            self.heights[square] = 0
+        self.white &= ~region
+        for square in iter_squares(region & self.black):
+            self.key ^= stack_key('black', square, self.heights[square])
+            self.counts['black'] -= self.heights[square]
+            self._add_black_estimate(square, -1)
+            self.heights[square] = 0
+        self.black &= ~region
+        self._components = None
+
+    def make_move(self, start_x, start_y, n, dest_x, dest_y):
+        """
+        Moves n pieces from the place of origin to the destination,
+        in place, and returns the undo entry of this movement. An
+        exception is thrown (and the board is left untouched) if the
+        movement violates the rules in Expendibots: a ValueError if the
+        destination is on neither the row nor the column of the origin.
+        :param start_x: the x-coordinate of the place of origin.
+        :param start_y: the y-coordinate of the place of origin.
+        :param n: number of pieces to be moved.
+        :param dest_x: the x-coordinate of the destination.
+        :param dest_y: the y-coordinate of the destination.
+        :return: the entry to be given to unmake.
+        """
+        if start_x != dest_x and start_y != dest_y:
+            raise ValueError('Invalid movement (neither horizontal nor '
+                             'vertical).')
+        squares = tuple((square_of(x, y), self.heights[square_of(x, y)])
+                        for (x, y) in ((start_x, start_y), (dest_x, dest_y))
+                        if 0 <= x < BitBoard.SIZE and 0 <= y < BitBoard.SIZE)
+        undo_entry = (self.key, self.white, self.black, squares,
+                      self._components, self.black_distances,
+                      self.heuristic_value)
+        self._move(start_x, start_y, n, dest_x, dest_y)
+        return undo_entry
+
+    def make_boom(self, start_x, start_y):
+        """
+        Initiates an EXPLOSION with a starting point, in place, and
+        returns the undo entry of this explosion, which holds all
+        the stacks that were removed.
+        :param start_x: the x-coordinate of the starting point
+        :param start_y: the y-coordinate of the starting point.
+        :return: the entry to be given to unmake.
+        """
+        region = self._explosion_of(square_of(start_x, start_y))
+        undo_entry = (self.key, self.white, self.black,
+                      tuple((square, self.heights[square])
+                            for square in iter_squares(region)),
+                      self._components, self.black_distances,
+                      self.heuristic_value)
+        self._remove(region)
+        return undo_entry
+
+    def unmake(self, undo_entry):
+        """
+        Reverts the last action made by make_move or make_boom.
+        :param undo_entry: the entry returned by that action.
+        """
+        key, white, black, squares, components, self.black_distances, \
+            self.heuristic_value = undo_entry
+        for (square, height) in squares:
+            color = self.color_of(square)
+            if color is not None:
+                self.counts[color] -= self.heights[square]
+        self.key, self.white, self.black, self._components = \
+            key, white, black, components
+        for (square, height) in squares:
+            color = self.color_of(square)
+            if color is not None:
+                self.counts[color] += height
+            self.heights[square] = height
+
+    def _move(self, start_x, start_y, n, dest_x, dest_y):
+        """
+        Moves n pieces from (start_x, start_y) to (dest_x, dest_y),
+        following the rules shared by the horizontal and vertical
+        movements.
+        """
+        origin = square_of(start_x, start_y)
+        color = self.color_of(origin)
+        if color is None or n <= 0:
+            return
+
+        # Check if the movement is doable
+        distance = abs(dest_x - start_x) + abs(dest_y - start_y)
+        if self.heights[origin] < max(distance, n):
+            raise IndexError('Insufficient pieces to perform movement.')
+        if not (0 <= dest_x < BitBoard.SIZE and 0 <= dest_y < BitBoard.SIZE):
+            raise IndexError('Invalid movement (out of board).')
+
+        destination = square_of(dest_x, dest_y)
+        dest_color = self.color_of(destination)
+        if dest_color is not None and dest_color != color:
+            raise IndexError('Invalid movement (opponent is present).')
+
+        self.key ^= stack_key(color, origin, self.heights[origin])
+        if dest_color is None:
+            self._place(color, destination, n)
+        else:
+            self.key ^= stack_key(color, destination, self.heights[destination])
+            self.heights[destination] += n
+            self.key ^= stack_key(color, destination, self.heights[destination])
+            if color == 'white':
+                self.heuristic_value += white_contribution(
+                    self.black_distances, destination, n)
+        self.heights[origin] -= n
+        self._components = None
+        if color == 'white':
+            self.heuristic_value -= white_contribution(
+                self.black_distances, origin, n)
+        if self.heights[origin] == 0:
+            self.white &= ~(1 << origin)
+            self.black &= ~(1 << origin)
+            if color == 'black':
+                self._add_black_estimate(origin, -1)
+        else:
+            self.key ^= stack_key(color, origin, self.heights[origin])
+
+    def move_horizontally(self, start_x, start_y, n, dx):
+        """
+        Moves pieces currently in the place of origin, horizontally.
+        This movement follows the rules in Expendibots. An exception
+        is thrown if any of these rules is violated.
+
+        :param start_x: the x-coordinate of the place of origin.
+        :param start_y: the y-coordinate of the place of origin.
+        :param n: number of pieces to be moved.
+        :param dx: the horizontal displacement.
+        """
+        if dx == 0:
+            return
+        self._move(start_x, start_y, n, start_x + dx, start_y)
+
+    def move_vertically(self, start_x, start_y, n, dy):
+        """
+        Moves pieces currently in the place of origin, vertically.
+        This movement follows the rules in Expendibots. An exception
+        is thrown if any of these rules is violated.
+
+        :param start_x: the x-coordinate of the place of origin.
+        :param start_y: the y-coordinate of the place of origin.
+        :param n: number of pieces to be moved.
+        :param dy: the vertical displacement.
+        """
+        if dy == 0:
+            return
+        self._move(start_x, start_y, n, start_x, start_y + dy)
+
+    def classify_mark(self, num_of_pieces=True) -> dict:
+        """
+        Returns a dictionary consisting 2 keys: 'black', and 'white',
+        in the same format as artifacts.Board.classify_mark.
+        :param num_of_pieces: whether number_of_pieces component should
+        be added to the tuple.
+        """
+        coords = {}
+        for color, mask in (('white', self.white), ('black', self.black)):
+            if num_of_pieces:
+                coords[color] = [(self.heights[square],) + coord_of(square)
+                                 for square in iter_squares(mask)]
+            else:
+                coords[color] = [coord_of(square)
+                                 for square in iter_squares(mask)]
+        return coords
@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+
+"""
+File: cache.py
+Contains the on-disk cache of the solutions found by the
+ArtificialPlayer, an SQLite database keyed by the canonical key of the
+starting board (see symmetry) and the settings of the search.
+Note: this file currently follows Python 3.7 syntax.
+"""
+
+from .actions import from_tuple
+from .symmetry import INVERSES, canonicalise, transform_actions
+from time import time
+import json
+import sqlite3
+
+__author__ = 'Natural Stupidity'
+__copyright__ = '© 2020 Natural Stupidity, Expendibots Game'
+__version__ = '1.0'
+__email__ = 'b.tran17@student.unimelb.edu.au'
+
+# The version of the solver, to be changed whenever the results of
+# the search change: every solution cached by another version is removed.
+SOLVER_VERSION = '2.1'
+
+
+class SolutionCache:
+    """
+    A cache of the action sequences found for the starting boards, with
+    the statistics of the search that found them (nodes and elapsed
+    time). A board and its rotated or reflected copies share one entry,
+    whose actions are stored for the canonical form of the board. The
+    cache holds at most max_entries entries, the least recently used
+    one being removed first. The cache can be given to worker processes:
+    each process opens its own connection to the database.
+    """
+    DEFAULT_SIZE = 10000
+
+    def __init__(self, path, max_entries=DEFAULT_SIZE, version=SOLVER_VERSION):
+        """
+        :param path: the path of the SQLite database, created if needed.
+        :param max_entries: the maximum number of entries of the cache.
+        :param version: the version of the solver, see SOLVER_VERSION.
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+        self._connection = None
+
+    def __getstate__(self) -> dict:
+        state = dict(self.__dict__)
+        state['_connection'] = None
+        return state
+
+    def __str__(self) -> str:
+        return 'SolutionCache({}, {}/{} entries, {} hits, {} misses)' \
+            .format(self.path, len(self), self.max_entries,
+                    self.hits, self.misses)
+
+    def __len__(self) -> int:
+        return self._connect().execute(
+            'SELECT COUNT(*) FROM solutions').fetchone()[0]
+
+    def _connect(self):
+        """
+        Returns the connection to the database, opened the first time
+        it is needed. The entries cached by another version of the
+        solver are removed then.
+        """
+        if self._connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            with connection:
+                connection.execute(
+                    'CREATE TABLE IF NOT EXISTS meta '
+                    '(name TEXT PRIMARY KEY, value TEXT)')
+                connection.execute(
+                    'CREATE TABLE IF NOT EXISTS solutions '
+                    '(key TEXT, settings TEXT, actions TEXT, nodes INTEGER, '
+                    'elapsed REAL, last_used REAL, '
+                    'PRIMARY KEY (key, settings))')
+                connection.execute(
+                    'CREATE INDEX IF NOT EXISTS solutions_last_used '
+                    'ON solutions (last_used)')
+                row = connection.execute(
+                    "SELECT value FROM meta WHERE name = 'version'").fetchone()
+                if row is None or row[0] != self.version:
+                    connection.execute('DELETE FROM solutions')
+                    connection.execute(
+                        "INSERT OR REPLACE INTO meta VALUES ('version', ?)",
+                        (self.version,))
+            self._connection = connection
+        return self._connection
+
+    def lookup(self, board, settings):
+        """
+        Returns the cached result of the search from the board: the
+        action sequence (None if the search failed), the number of nodes
+        and the elapsed time of the search that found it. Returns None if
+        the board is not in the cache.
+        :param board: the starting board.
+        :param settings: the settings of the search, as a string.
+        """
+        key, symmetry = canonicalise(board)
+        connection = self._connect()
+        row = connection.execute(
+            'SELECT actions, nodes, elapsed FROM solutions '
+            'WHERE key = ? AND settings = ?',
+            ('{:016x}'.format(key), settings)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        with connection:
+            connection.execute(
+                'UPDATE solutions SET last_used = ? '
+                'WHERE key = ? AND settings = ?',
+                (time(), '{:016x}'.format(key), settings))
+        actions = json.loads(row[0])
+        if actions is not None:
+            actions = transform_actions([from_tuple(action)
+                                         for action in actions],
+                                        INVERSES[symmetry])
+        return actions, row[1], row[2]
+
+    def store(self, board, settings, actions, nodes, elapsed):
+        """
+        Stores the result of the search from the board, then removes the
+        least recently used entries beyond max_entries.
+        :param board: the starting board.
+        :param settings: the settings of the search, as a string.
+        :param actions: the winning action sequence, or None.
+        :param nodes: the number of nodes searched.
+        :param elapsed: the elapsed time of the search, in seconds.
+        """
+        key, symmetry = canonicalise(board)
+        if actions is not None:
+            actions = [action.to_tuple()
+                       for action in transform_actions(actions, symmetry)]
+        connection = self._connect()
+        with connection:
+            connection.execute(
+                'INSERT OR REPLACE INTO solutions VALUES (?, ?, ?, ?, ?, ?)',
+                ('{:016x}'.format(key), settings, json.dumps(actions),
+                 nodes, elapsed, time()))
+            connection.execute(
+                'DELETE FROM solutions WHERE rowid IN (SELECT rowid '
+                'FROM solutions ORDER BY last_used DESC LIMIT -1 OFFSET ?)',
+                (self.max_entries,))
+
+    def clear(self):
+        """
+        Removes all entries from the cache, keeping the counters.
+        """
+        connection = self._connect()
+        with connection:
+            connection.execute('DELETE FROM solutions')
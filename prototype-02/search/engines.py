@@ -0,0 +1,196 @@
+#!/usr/bin/env python
+
+"""
+File: engines.py
+Contains the best-first search algorithms of the ArtificialPlayer:
+A*, weighted A* and beam search. They trade memory for time compared
+to the iterative deepening searches, as they keep every state found:
+the states waiting to be expanded, and for every other state, only the
+index of its parent and its packed action (see NodeArena).
+Note: this file currently follows Python 3.7 syntax.
+"""
+
+from .actions import from_int
+from array import array
+from heapq import heappush, heappop, nsmallest
+from itertools import count
+from math import inf
+
+__author__ = 'Natural Stupidity'
+__copyright__ = '© 2020 Natural Stupidity, Expendibots Game'
+__version__ = '1.0'
+__email__ = 'b.tran17@student.unimelb.edu.au'
+
+
+class NodeArena:
+    """
+    The tree of the states found by a best-first search, as two arrays
+    indexed by the states: the index of the parent (-1 for the start
+    state) and the action taken from it, packed into an integer (see
+    Action.to_int). The states added are detached from their parent,
+    so that the boards of the states already expanded can be freed.
+    The actions are only unpacked when the path to a goal is asked for.
+    """
+    __slots__ = ('parents', 'actions')
+
+    def __init__(self):
+        self.parents = array('l')
+        self.actions = array('L')
+
+    def __len__(self) -> int:
+        return len(self.parents)
+
+    def add(self, parent, state) -> int:
+        """
+        Adds the state, detached from its parent, and returns its index.
+        :param parent: the index of the parent, or -1 for the start state.
+        :param state: the StateNode added.
+        """
+        self.parents.append(parent)
+        self.actions.append(0 if state.action_taken is None
+                            else state.action_taken.to_int())
+        state.parent = None
+        state.action_taken = None
+        return len(self.parents) - 1
+
+    def path(self, index) -> list:
+        """
+        Returns the actions taken from the start state to the state.
+        :param index: the index of the state.
+        """
+        actions = []
+        while self.parents[index] >= 0:
+            actions.append(from_int(self.actions[index]))
+            index = self.parents[index]
+        actions.reverse()
+        return actions
+
+    def goal(self, player, index, state):
+        """
+        Returns the goal node reached by the state of the given index
+        (and by the actions of the StateNode chain from that state, if
+        any), rebuilt from the start state of the player.
+        """
+        return player.replay(self.path(index) + state.path())
+
+
+def astar(player, weight=1.0, max_depth=250):
+    """
+    The implementation of the A* search, with an open list ordered by
+    f = g + weight * h and a closed set of board keys (see
+    ArtificialPlayer.state_key). With a weight
+    greater than 1 (weighted A*), solutions are found faster, but may
+    be longer.
+    :param player: the ArtificialPlayer, supplying the start state,
+    the (expanded) next states, the heuristic and the goal function.
+    :param weight: the weight of the heuristic.
+    :param max_depth: the maximum depth allowed.
+    :return: the goal node, or None if the goal is unreachable.
+    """
+    tie_breaker = count()
+    start = player.start_state
+    start_key = player.state_key(start)
+    arena = NodeArena()
+    open_list = [(weight * player.heuristic(start), next(tie_breaker),
+                  start_key, arena.add(-1, start), start)]
+    best_costs = {start_key: 0}
+    closed = set()
+    player.nodes = 0
+    bound = 0
+    while open_list:
+        bound, _, key, index, node = heappop(open_list)
+        if key in closed:
+            continue
+        if player.goal_function(node):
+            player.record_iteration(bound)
+            return arena.goal(player, index, node)
+        closed.add(key)
+        player.nodes += 1
+        if player.interrupted():
+            break
+        if player.anytime:
+            player.observe(node, arena, index)
+        if node.depth >= max_depth:
+            continue
+
+        # Small enough for the tablebase: the goal it leads to is
+        # queued instead of the next states.
+        distance = player.probe(node)
+        if distance is not None:
+            if node.depth + distance <= max_depth:
+                heappush(open_list, (node.depth + distance, next(tie_breaker),
+                                     None, index,
+                                     player.finish(node, distance)))
+            continue
+        for next_state, estimate in player.expand_scored(node):
+            next_key = player.state_key(next_state)
+            if next_key in closed \
+                    or next_state.depth >= best_costs.get(next_key, inf):
+                continue
+            best_costs[next_key] = next_state.depth
+            if estimate is None:
+                estimate = player.heuristic(next_state)
+            heappush(open_list, (next_state.depth + weight * estimate,
+                                 next(tie_breaker), next_key,
+                                 arena.add(index, next_state), next_state))
+    player.record_iteration(bound)
+    return None
+
+
+def beam_search(player, width, max_depth=250):
+    """
+    The implementation of the beam search: a breadth first search
+    keeping only the given number of nodes (those with the lowest
+    heuristic) at each depth. It is not complete, but its memory is
+    bounded by the width of the beam.
+    :param player: the ArtificialPlayer, supplying the start state,
+    the (expanded) next states, the heuristic and the goal function.
+    :param width: the number of nodes kept at each depth.
+    :param max_depth: the maximum depth allowed.
+    :return: the goal node, or None if no goal has been found.
+    """
+    start = player.start_state
+    if player.goal_function(start):
+        return start
+    tie_breaker = count()
+    seen = {player.state_key(start)}
+    arena = NodeArena()
+    beam = [(arena.add(-1, start), start)]
+    for depth in range(1, max_depth + 1):
+        player.nodes = 0
+        if player.interrupted(check_now=True):
+            break
+        candidates = []
+        for (index, node) in beam:
+            player.nodes += 1
+            if player.interrupted():
+                player.record_iteration(depth)
+                return None
+            if player.anytime:
+                player.observe(node, arena, index)
+            for next_state, estimate in player.expand_scored(node):
+                next_key = player.state_key(next_state)
+                if next_key in seen:
+                    continue
+                if player.goal_function(next_state):
+                    player.record_iteration(depth)
+                    return arena.goal(player, index, next_state)
+                distance = player.probe(next_state)
+                if distance is not None:
+                    if depth + distance <= max_depth:
+                        player.record_iteration(depth)
+                        return arena.goal(player, index,
+                                          player.finish(next_state, distance))
+                    continue
+                seen.add(next_key)
+                if estimate is None:
+                    estimate = player.heuristic(next_state)
+                candidates.append((estimate,
+                                   next(tie_breaker),
+                                   arena.add(index, next_state), next_state))
+        player.record_iteration(depth)
+        if not candidates:
+            break
+        beam = [(index, node) for (_, _, index, node)
+                in nsmallest(width, candidates)]
+    return None
@@ -0,0 +1,190 @@
+#!/usr/bin/env python
+
+"""
+File: generator.py
+Contains the generator of random boards, in the json format read by the
+solver: seeded, and parameterised by the number of pieces of each
+player, the distribution of the heights of their stacks, and the
+density of the clusters of black stacks. It also generates the boards
+of a sweep of one of these parameters, measured by the benchmark
+(python -m search.bench --sweep) to draw the scaling curves of the
+engines.
+Note: this file currently follows Python 3.7 syntax.
+Usage: python -m search.generator [--whites N] [--blacks N] [--count K]
+"""
+
+from .movegen import NEIGHBOURS, NUM_SQUARES, SIZE
+from random import Random
+import argparse
+import json
+import os
+
+__author__ = 'Natural Stupidity'
+__copyright__ = '© 2020 Natural Stupidity, Expendibots Game'
+__version__ = '1.0'
+__email__ = 'b.tran17@student.unimelb.edu.au'
+
+# The number of pieces of each player at the start of a game.
+MAX_PIECES = 12
+# The parameters of generate that can be swept.
+SWEEPABLE = ('num_whites', 'num_blacks', 'cluster_density')
+
+
+def _stack_heights(num_pieces, heights, random) -> list:
+    """
+    Returns the heights of the stacks of the given number of pieces, the
+    height of every stack being drawn from the distribution (the last
+    stack is cut down to the pieces left).
+    """
+    stacks = []
+    while num_pieces > 0:
+        height = random.choices(range(1, len(heights) + 1), heights)[0]
+        stacks.append(min(height, num_pieces))
+        num_pieces -= stacks[-1]
+    return stacks
+
+
+def generate(num_whites, num_blacks, heights=(1,), cluster_density=0.0,
+             seed=None) -> dict:
+    """
+    Returns a random board, in the dictionary data type read by the
+    ArtificialPlayer. The stacks are on distinct squares, the black
+    stacks first: each one is put next to a black stack already placed
+    with the probability cluster_density (dense clusters are removed
+    by few booms), and on any free square otherwise.
+    :param num_whites: the number of white pieces, 1 to 12.
+    :param num_blacks: the number of black pieces, 1 to 12.
+    :param heights: the weights of the heights of the stacks: heights[i]
+    is the weight of the height i + 1, (1,) meaning single pieces only.
+    :param cluster_density: the probability, from 0 to 1, that a black
+    stack touches another black stack.
+    :param seed: the seed of the board, or a random.Random.
+    """
+    for (name, value) in (('white', num_whites), ('black', num_blacks)):
+        if not 1 <= value <= MAX_PIECES:
+            raise ValueError('The number of {} pieces must be 1 to {}, not {}.'
+                             .format(name, MAX_PIECES, value))
+    if not 0 <= cluster_density <= 1:
+        raise ValueError('The cluster density must be 0 to 1, not {}.'
+                         .format(cluster_density))
+    if not heights or min(heights) < 0 or sum(heights) <= 0:
+        raise ValueError('The weights of the heights must be positive.')
+    random = seed if isinstance(seed, Random) else Random(seed)
+    free = set(range(0, NUM_SQUARES))
+    blacks = []
+    for height in _stack_heights(num_blacks, heights, random):
+        near = sorted(set(neighbour for (_, square) in blacks
+                          for neighbour in NEIGHBOURS[square]) & free)
+        if near and random.random() < cluster_density:
+            square = random.choice(near)
+        else:
+            square = random.choice(sorted(free))
+        free.remove(square)
+        blacks.append((height, square))
+    whites = []
+    for height in _stack_heights(num_whites, heights, random):
+        square = random.choice(sorted(free))
+        free.remove(square)
+        whites.append((height, square))
+    return {'white': [[n, square // SIZE, square % SIZE]
+                      for (n, square) in whites],
+            'black': [[n, square // SIZE, square % SIZE]
+                      for (n, square) in blacks]}
+
+
+def generate_many(count, seed=None, **params) -> list:
+    """
+    Returns the (board id, data) of the given number of random boards,
+    the ids being gen-<seed>-<number>.
+    :param count: the number of boards.
+    :param seed: the seed of the whole sequence of boards.
+    :param params: the parameters of generate.
+    """
+    random = Random(seed)
+    return [('gen-{}-{}'.format(seed, i), generate(seed=random, **params))
+            for i in range(0, count)]
+
+
+def sweep_cases(parameter, values, samples=5, seed=None, **params) -> list:
+    """
+    Returns the (value, boards) of a sweep of one parameter of generate:
+    for every value, the given number of random boards, generated with
+    that value and the other parameters unchanged.
+    :param parameter: the parameter swept, one of SWEEPABLE.
+    :param values: the values of the parameter.
+    :param samples: the number of boards of every value.
+    :param seed: the seed of the sweep.
+    :param params: the other parameters of generate.
+    """
+    if parameter not in SWEEPABLE:
+        raise ValueError('{} cannot be swept, only one of {}.'
+                         .format(parameter, ', '.join(SWEEPABLE)))
+    random = Random(seed)
+    sweep = []
+    for value in values:
+        params[parameter] = value
+        sweep.append((value, [('sweep-{}-{}-{}'.format(parameter, value, i),
+                               generate(seed=random, **params))
+                              for i in range(0, samples)]))
+    return sweep
+
+
+def parse_heights(text) -> tuple:
+    """
+    Returns the weights of the heights of a comma-separated list, such
+    as 3,1 (three stacks of 1 piece for one stack of 2 pieces).
+    """
+    return tuple(float(weight) for weight in text.split(','))
+
+
+def add_arguments(parser):
+    """
+    Adds the parameters of generate to the command line parser.
+    """
+    parser.add_argument('--whites', type=int, default=3,
+                        help='the number of white pieces (default 3).')
+    parser.add_argument('--blacks', type=int, default=4,
+                        help='the number of black pieces (default 4).')
+    parser.add_argument('--heights', type=parse_heights, default=(1,),
+                        help='the weights of the heights of the stacks, '
+                             'from height 1: 3,1 gives one stack of 2 pieces '
+                             'for three single pieces (default 1).')
+    parser.add_argument('--cluster', type=float, default=0.0,
+                        help='the probability that a black stack touches '
+                             'another black stack (default 0).')
+    parser.add_argument('--seed', type=int, default=2020,
+                        help='the seed of the boards (default 2020).')
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog='search.generator',
+        description='Generates random boards of the Expendibots game.')
+    add_arguments(parser)
+    parser.add_argument('--count', type=int, default=1,
+                        help='the number of boards (default 1).')
+    parser.add_argument('--output', default=None,
+                        help='the directory the boards are written to, one '
+                             'json file each (default: the standard output, '
+                             'one board per line).')
+    args = parser.parse_args()
+    try:
+        boards = generate_many(args.count, args.seed,
+                               num_whites=args.whites, num_blacks=args.blacks,
+                               heights=args.heights,
+                               cluster_density=args.cluster)
+    except ValueError as error:
+        parser.error(str(error))
+    if args.output is not None:
+        os.makedirs(args.output, exist_ok=True)
+        for (board_id, data) in boards:
+            with open(os.path.join(args.output, board_id + '.json'), 'w') \
+                    as file:
+                json.dump(data, file)
+    else:
+        for (_, data) in boards:
+            print(json.dumps(data))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,236 @@
+#!/usr/bin/env python
+
+"""
+File: heuristics.py
+Contains the precomputed tables used to evaluate the heuristic of the
+ArtificialPlayer, and the admissible heuristic built on the jump-distance
+maps of the stacks. The squares are numbered as (x * 8 + y).
+Note: this file currently follows Python 3.7 syntax.
+"""
+
+from .movegen import NEIGHBOURS
+from functools import lru_cache
+from math import inf
+
+__author__ = 'Natural Stupidity'
+__copyright__ = '© 2020 Natural Stupidity, Expendibots Game'
+__version__ = '1.0'
+__email__ = 'b.tran17@student.unimelb.edu.au'
+
+SIZE = 8
+NUM_SQUARES = SIZE * SIZE
+
+# MANHATTAN[a][b] is the manhattan distance between the squares a and b.
+MANHATTAN = [[abs(a // SIZE - b // SIZE) + abs(a % SIZE - b % SIZE)
+              for b in range(0, NUM_SQUARES)]
+             for a in range(0, NUM_SQUARES)]
+
+# The distances from every square to a board without black stacks.
+NO_DISTANCES = (0,) * NUM_SQUARES
+
+
+def add_black(distances, square, sign=1) -> tuple:
+    """
+    Returns the sums of the manhattan distances from every square to
+    all black stacks, after a black stack is added to (sign = 1) or
+    removed from (sign = -1) the given square. The sums are kept in
+    tuples, so that they can be shared between copies of a board.
+    :param distances: the sums before the change.
+    :param square: the square of the black stack.
+    :param sign: 1 if the stack is added, -1 if it is removed.
+    """
+    row = MANHATTAN[square]
+    return tuple(distances[i] + sign * row[i] for i in range(0, NUM_SQUARES))
+
+
+def white_contribution(distances, square, n) -> int:
+    """
+    Returns the contribution of a white stack of n pieces on the
+    square to the heuristic: n * sum(manhattan_dist_to_all_blacks).
+    :param distances: the sums of the distances to all black stacks.
+    :param square: the square of the white stack.
+    :param n: the number of pieces in the white stack.
+    """
+    return n * distances[square]
+
+
+def black_contribution(whites, square) -> int:
+    """
+    Returns the contribution of a black stack on the square to the
+    heuristic: sum(total_whites_on_that_coord * manhattan_dist).
+    :param whites: the (square, n) of all white stacks.
+    :param square: the square of the black stack.
+    """
+    row = MANHATTAN[square]
+    return sum(n * row[white] for (white, n) in whites)
+
+
+# The stacks never move further than the edge of the board, so the
+# jump-distance maps of the stacks higher than this are the same.
+MAX_JUMP = SIZE - 1
+_jump_distances = {}
+
+
+def jump_distances(height) -> list:
+    """
+    Returns the jump-distance map of a stack of the given height:
+    map[a][b] is the smallest number of moves taking the stack from
+    the square a to the square b, jumping 1 to height squares up, down,
+    left or right at each move (ignoring the other stacks). The maps
+    are computed by a breadth first search from every square, the first
+    time they are asked for, then cached.
+    :param height: the number of pieces in the stack.
+    """
+    height = max(1, min(height, MAX_JUMP))
+    if height not in _jump_distances:
+        distance_map = []
+        for source in range(0, NUM_SQUARES):
+            distances = [None] * NUM_SQUARES
+            distances[source] = 0
+            frontier = [source]
+            while frontier:
+                next_frontier = []
+                for square in frontier:
+                    x, y = divmod(square, SIZE)
+                    for jump in range(1, height + 1):
+                        for (tx, ty) in ((x + jump, y), (x - jump, y),
+                                         (x, y + jump), (x, y - jump)):
+                            if 0 <= tx < SIZE and 0 <= ty < SIZE \
+                                    and distances[tx * SIZE + ty] is None:
+                                distances[tx * SIZE + ty] = \
+                                    distances[square] + 1
+                                next_frontier.append(tx * SIZE + ty)
+                frontier = next_frontier
+            distance_map.append(distances)
+        _jump_distances[height] = distance_map
+    return _jump_distances[height]
+
+
+def _chebyshev(a, b) -> int:
+    """
+    Returns the chebyshev (king move) distance between the squares a and b.
+    """
+    return max(abs(a // SIZE - b // SIZE), abs(a % SIZE - b % SIZE))
+
+
+# The number of black occupancy masks whose results are memoised by
+# black_clusters and moves_to_blacks, the least recently used ones being
+# dropped first: a search only meets the masks left by its booms, but a
+# long-running process (batch mode) meets those of every board.
+MEMO_SIZE = 4096
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def black_clusters(black_mask) -> tuple:
+    """
+    Returns the 8-connected clusters of the black stacks (as tuples of
+    squares), and the gaps between them: (gap, i, j) for every pair of
+    clusters i < j, where the gap is the smallest chebyshev distance
+    between a stack of the cluster i and a stack of the cluster j. The
+    results are memoised by the black occupancy mask (see MEMO_SIZE),
+    as the black stacks never move, and only disappear.
+    :param black_mask: the mask of the squares holding a black stack.
+    """
+    squares = [square for square in range(0, NUM_SQUARES)
+               if black_mask >> square & 1]
+    clusters = []
+    unvisited = set(squares)
+    for square in squares:
+        if square not in unvisited:
+            continue
+        unvisited.discard(square)
+        cluster, frontier = [square], [square]
+        while frontier:
+            current = frontier.pop()
+            for other in list(unvisited):
+                if _chebyshev(current, other) <= 1:
+                    unvisited.discard(other)
+                    cluster.append(other)
+                    frontier.append(other)
+        clusters.append(tuple(sorted(cluster)))
+    gaps = [(min(_chebyshev(a, b) for a in clusters[i] for b in clusters[j]),
+             i, j)
+            for i in range(0, len(clusters))
+            for j in range(i + 1, len(clusters))]
+    return clusters, gaps
+
+
+def booms_needed(black_mask, num_whites) -> int:
+    """
+    Returns a lower bound of the number of booms removing all black
+    stacks. A boom removes a whole 8-connected group of stacks, so two
+    black clusters can only be removed by the same boom if the white
+    pieces can fill the gap between them: a gap of at most
+    num_whites + 1. The bound is the number of groups of clusters
+    linked by such gaps.
+    :param black_mask: the mask of the squares holding a black stack.
+    :param num_whites: the number of white pieces on the board.
+    """
+    clusters, gaps = black_clusters(black_mask)
+    groups = list(range(0, len(clusters)))
+
+    def group_of(i):
+        while groups[i] != i:
+            groups[i] = groups[groups[i]]
+            i = groups[i]
+        return i
+
+    count = len(clusters)
+    for (gap, i, j) in gaps:
+        if gap <= num_whites + 1 and group_of(i) != group_of(j):
+            groups[group_of(i)] = group_of(j)
+            count -= 1
+    return count
+
+
+def moves_to_blacks(black_mask, num_whites) -> list:
+    """
+    Returns the smallest number of moves taking a white stack from
+    every square to a square next to a black stack, where a boom would
+    remove it. Any stack is at most num_whites high, so the moves are
+    counted with the jump-distance map of that height. The results are
+    memoised by the black occupancy mask and num_whites (see MEMO_SIZE).
+    :param black_mask: the mask of the squares holding a black stack.
+    :param num_whites: the number of white pieces on the board.
+    """
+    return _moves_to_blacks(black_mask, max(1, min(num_whites, MAX_JUMP)))
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def _moves_to_blacks(black_mask, height) -> list:
+    """
+    The memoised moves_to_blacks, for a stack height already limited
+    to the jump-distance maps that differ (see MAX_JUMP).
+    """
+    distance_map = jump_distances(height)
+    targets = {neighbour
+               for square in range(0, NUM_SQUARES) if black_mask >> square & 1
+               for neighbour in NEIGHBOURS[square]
+               if not black_mask >> neighbour & 1}
+    return [min((distance_map[square][target] for target in targets),
+                default=inf)
+            for square in range(0, NUM_SQUARES)]
+
+
+def admissible_estimate(board):
+    """
+    Returns a lower bound of the number of actions winning the game
+    from the board (inf if it cannot be won): the booms needed (see
+    booms_needed), plus the moves needed before the first boom removing
+    a black stack, if no white stack is next to a black stack yet
+    (see moves_to_blacks). Every boom removes at least one white piece,
+    so there is no win with fewer white pieces than booms needed.
+    :param board: the board, either artifacts.Board or bitboard.BitBoard.
+    """
+    coords = board.classify_mark(num_of_pieces=False)
+    if not coords['black']:
+        return 0
+    num_whites = board.piece_count('white')
+    black_mask = 0
+    for (x, y) in coords['black']:
+        black_mask |= 1 << (x * SIZE + y)
+    booms = booms_needed(black_mask, num_whites)
+    if booms > num_whites:
+        return inf
+    distances = moves_to_blacks(black_mask, num_whites)
+    return booms + min(distances[x * SIZE + y] for (x, y) in coords['white'])
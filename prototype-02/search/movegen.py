@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+
+"""
+File: movegen.py
+Contains the legal move generator of the Expendibots game.
+The squares reachable from every square are precomputed once, so that
+generating the actions of a board never tries an illegal movement.
+Note: this file currently follows Python 3.7 syntax.
+"""
+
+from .actions import Move, Boom
+
+__author__ = 'Natural Stupidity'
+__copyright__ = '© 2020 Natural Stupidity, Expendibots Game'
+__version__ = '1.0'
+__email__ = 'b.tran17@student.unimelb.edu.au'
+
+SIZE = 8
+NUM_SQUARES = SIZE * SIZE
+# A stack may hold all 12 pieces of a player, but can never
+# move further than the edge of the board.
+MAX_DISTANCE = SIZE - 1
+
+# COORDS[square] is the coordinate (x, y) of the square (x * 8 + y).
+COORDS = [divmod(square, SIZE) for square in range(0, NUM_SQUARES)]
+
+
+def _targets_of(square, distance) -> tuple:
+    """
+    Returns the squares that are exactly the given distance away from
+    the square, moving up, down, left or right, and still on the board.
+    """
+    x, y = COORDS[square]
+    return tuple(tx * SIZE + ty
+                 for (tx, ty) in ((x + distance, y), (x - distance, y),
+                                  (x, y + distance), (x, y - distance))
+                 if 0 <= tx < SIZE and 0 <= ty < SIZE)
+
+
+# TARGETS[square][distance] are the squares reachable from the square
+# by moving exactly that distance (TARGETS[square][0] is empty).
+TARGETS = [[_targets_of(square, distance) if distance > 0 else ()
+            for distance in range(0, MAX_DISTANCE + 1)]
+           for square in range(0, NUM_SQUARES)]
+
+
+def _neighbours_of(square) -> tuple:
+    """
+    Returns the (up to 8) squares surrounding the square.
+    """
+    x, y = COORDS[square]
+    return tuple((x + dx) * SIZE + (y + dy)
+                 for dx in (-1, 0, 1) for dy in (-1, 0, 1)
+                 if (dx, dy) != (0, 0)
+                 and 0 <= x + dx < SIZE and 0 <= y + dy < SIZE)
+
+
+# NEIGHBOURS[square] are the squares reached by an explosion at the square.
+NEIGHBOURS = [_neighbours_of(square) for square in range(0, NUM_SQUARES)]
+
+
+def legal_actions(board, color='white'):
+    """
+    Yields every legal action of the player of the given color on the
+    board: all the movements of 1 to n pieces of each of its stacks to
+    an empty square or a stack of the same color, then the booms.
+    A boom at any stack of an 8-connected group of stacks removes the
+    whole group, so only one boom is yielded per group, at its first
+    stack of the given color. No action is yielded twice (and no two
+    actions lead to the same board), and no exception is raised.
+    :param board: the board, either artifacts.Board or bitboard.BitBoard.
+    :param color: the color of the player, 'white' or 'black'.
+    """
+    for (n, x, y) in board.classify_mark()[color]:
+        origin = x * SIZE + y
+        for distance in range(1, min(n, MAX_DISTANCE) + 1):
+            for target in TARGETS[origin][distance]:
+                target_color = board.color_of(target)
+                if target_color is None or target_color == color:
+                    for i in range(1, n + 1):
+                        yield Move(i, (x, y), COORDS[target])
+    for component in board.components():
+        for square in component:
+            if board.color_of(square) == color:
+                yield Boom(COORDS[square])
+                break
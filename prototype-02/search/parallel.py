@@ -0,0 +1,164 @@
+#!/usr/bin/env python
+
+"""
+File: parallel.py
+Contains the parallel search of the ArtificialPlayer: the first plies
+from the start state are expanded, then the subtrees below them are
+searched by a pool of worker processes.
+Note: this file currently follows Python 3.7 syntax.
+"""
+
+from .artifacts import ArtificialPlayer, StateNode
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from multiprocessing import Value
+
+__author__ = 'Natural Stupidity'
+__copyright__ = '© 2020 Natural Stupidity, Expendibots Game'
+__version__ = '1.0'
+__email__ = 'b.tran17@student.unimelb.edu.au'
+
+# The length of the shortest plan found by any worker (0 if none yet),
+# shared by the worker processes (see _init_worker).
+_best = None
+
+
+def _init_worker(best):
+    """
+    Stores the shared length of the best plan in the worker process.
+    """
+    global _best
+    _best = best
+
+
+def split_root(player, plies=1) -> tuple:
+    """
+    Expands the first plies from the start state of the player, and
+    returns the subtrees to be searched: the list of the action sequences
+    leading to them, in the order of ArtificialPlayer.get_next_states
+    (boards reached twice are kept once), or the goal node if it is
+    reached within these plies.
+    :param player: the ArtificialPlayer.
+    :param plies: the number of plies expanded.
+    :return: (goal node or None, list of action sequences).
+    """
+    frontier = [player.start_state]
+    seen = {player.state_key(player.start_state)}
+    for _ in range(0, plies):
+        next_frontier = []
+        for node in frontier:
+            if player.goal_function(node):
+                return node, []
+            children = list(player.get_next_states(node))
+            if not children:
+                # Kept as a subtree, to be reported as a failure.
+                next_frontier.append(node)
+            for next_state in children:
+                key = player.state_key(next_state)
+                if key not in seen:
+                    seen.add(key)
+                    next_frontier.append(next_state)
+        frontier = next_frontier
+    for node in frontier:
+        if player.goal_function(node):
+            return node, []
+    return None, [node.path() for node in frontier]
+
+
+def _search_subtree(data, options, prefix, max_depth, engine, weight,
+                    beam_width, deterministic) -> tuple:
+    """
+    Searches one subtree in a worker process: the board reached by the
+    prefix of actions is the start state of a new ArtificialPlayer.
+    Unless deterministic, the search stops as soon as any worker has
+    found a plan (see ArtificialPlayer.interrupted). Otherwise, the
+    iterative deepening search stops once the plans of its depth would
+    be longer than the best plan found by any worker: the plans as long
+    as the best one are still searched, so that ties are broken the
+    same way whatever the timing of the workers.
+    :return: the winning action sequence from the start (or None), and
+    the number of nodes searched.
+    """
+    player = ArtificialPlayer(data, **options)
+    board = player.start_state.value
+    for action in prefix:
+        action.apply_to(board)
+    player.start_state = StateNode(board, None)
+    if not deterministic:
+        player.stop = lambda: _best.value != 0
+    elif engine == 'ids':
+        player.stop = lambda: _best.value != 0 \
+            and len(prefix) + player.bound > _best.value
+    goal = player.search(max_depth - len(prefix), engine, weight, beam_width)
+    nodes = sum(nodes for (_, nodes) in player.iterations)
+    if goal is None:
+        return None, nodes
+    actions = prefix + goal.path()
+    with _best.get_lock():
+        if _best.value == 0 or len(actions) < _best.value:
+            _best.value = len(actions)
+    return actions, nodes
+
+
+def parallel_search(data, options, workers, plies=1, max_depth=250,
+                    engine='ids', weight=2.0, beam_width=64,
+                    deterministic=False) -> tuple:
+    """
+    Runs the search of an ArtificialPlayer on a pool of worker processes:
+    the first plies are expanded (see split_root), then each subtree is
+    searched by one worker, with the given engine.
+    - By default, the first plan found is returned, and the workers
+    still searching are stopped (or cancelled if not started yet). The
+    plan found depends on the timing of the workers.
+    - If deterministic, every subtree is searched until it cannot give
+    a plan shorter than the best one found (the workers share its
+    length), and the shortest plan is returned, the first subtree
+    winning ties, so that the result does not depend on the number of
+    workers. Only the iterative deepening search is cut that way, the
+    other engines search every subtree to the end.
+    :param data: the dictionary data type of the board.
+    :param options: the keyword arguments of the ArtificialPlayer.
+    :param workers: the number of worker processes.
+    :param plies: the number of plies expanded before the split.
+    :param max_depth: the maximum depth allowed.
+    :param engine: the search algorithm of the workers.
+    :param weight: the weight of the heuristic in weighted A*.
+    :param beam_width: the number of nodes kept at each depth in
+    beam search.
+    :param deterministic: whether the result must not depend on timing.
+    :return: the winning action sequence (or None if not found), and
+    the number of nodes searched by each subtree (None if cancelled).
+    """
+    player = ArtificialPlayer(data, **options)
+    goal, prefixes = split_root(player, plies)
+    if goal is not None:
+        return goal.path(), []
+    best = Value('i', 0)
+    results = [None] * len(prefixes)
+    nodes = [None] * len(prefixes)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(best,)) as executor:
+        futures = {executor.submit(_search_subtree, data, options, prefix,
+                                   max_depth, engine, weight, beam_width,
+                                   deterministic): i
+                   for (i, prefix) in enumerate(prefixes)}
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[futures[future]], nodes[futures[future]] = \
+                    future.result()
+            if not deterministic and any(result is not None
+                                         for result in results):
+                for future in pending:
+                    future.cancel()
+                done, _ = wait(pending)
+                for future in done:
+                    if not future.cancelled():
+                        results[futures[future]], nodes[futures[future]] = \
+                            future.result()
+                break
+    found = [(len(result), i) for (i, result) in enumerate(results)
+             if result is not None]
+    if not found:
+        return None, nodes
+    return results[min(found)[1]], nodes
@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+
+"""
+File: player.py
+Contains the players of the full Expendibots game, with the interface
+expected by the referee: action() returns the action of the player, in
+the format of the referee, and update(colour, action) tells the player
+the action just made by either player. AlphaBetaPlayer searches with
+adversarial.AlphaBeta, RandomPlayer is a baseline opponent.
+Note: this file currently follows Python 3.7 syntax.
+"""
+
+from .actions import from_tuple
+from .adversarial import AlphaBeta, MAX_PLY
+from .artifacts import Board
+from .movegen import legal_actions
+from .transposition import TranspositionTable
+from random import Random
+
+__author__ = 'Natural Stupidity'
+__copyright__ = '© 2020 Natural Stupidity, Expendibots Game'
+__version__ = '1.0'
+__email__ = 'b.tran17@student.unimelb.edu.au'
+
+# The starting board of a game: 12 single pieces per player, on the
+# two rows of its side of the board.
+START = {'white': [[1, x, y] for y in (0, 1) for x in (0, 1, 3, 4, 6, 7)],
+         'black': [[1, x, y] for y in (6, 7) for x in (0, 1, 3, 4, 6, 7)]}
+
+
+class AlphaBetaPlayer:
+    """
+    A player searching its actions with the negamax alpha-beta search
+    (see adversarial.AlphaBeta), on its own copy of the board, kept up
+    to date by update.
+    """
+
+    def __init__(self, colour, time_limit=1.0, max_depth=MAX_PLY,
+                 board_type=Board, table_size=TranspositionTable.DEFAULT_SIZE):
+        """
+        :param colour: the colour of the player, 'white' or 'black'.
+        :param time_limit: the time of the search of every action, in
+        seconds, or None (then max_depth must be small).
+        :param max_depth: the maximum depth of the search of every action.
+        :param board_type: the board implementation used in the search,
+        either artifacts.Board or bitboard.BitBoard.
+        :param table_size: the maximum number of entries of the
+        transposition table, or 0 to search without one.
+        """
+        self.colour = colour
+        self.time_limit = time_limit
+        self.max_depth = max_depth
+        self.board = board_type(START)
+        self.engine = AlphaBeta(table_size)
+
+    def action(self) -> tuple:
+        """
+        Returns the action of the player, in the format of the referee.
+        """
+        return self.engine.search(self.board, self.colour, self.time_limit,
+                                  self.max_depth).to_tuple()
+
+    def principal_variation(self) -> list:
+        """
+        Returns the line of play expected by the last search, from the
+        board before its action, read from the transposition table
+        (see AlphaBeta.principal_variation). Called between action and
+        update, it starts with the action of the player.
+        """
+        return self.engine.principal_variation(self.board, self.colour)
+
+    def update(self, colour, action):
+        """
+        Applies the action made by a player to the board.
+        :param colour: the colour of the player who made the action.
+        :param action: the action, in the format of the referee.
+        """
+        from_tuple(action).apply_to(self.board)
+
+
+class RandomPlayer:
+    """
+    A player choosing any legal action at random: a baseline opponent.
+    """
+
+    def __init__(self, colour, seed=None, board_type=Board):
+        """
+        :param colour: the colour of the player, 'white' or 'black'.
+        :param seed: the seed of the random actions.
+        :param board_type: the board implementation.
+        """
+        self.colour = colour
+        self.board = board_type(START)
+        self.random = Random(seed)
+
+    def action(self) -> tuple:
+        """
+        Returns a random legal action, in the format of the referee.
+        """
+        return self.random.choice(list(legal_actions(self.board,
+                                                     self.colour))).to_tuple()
+
+    def update(self, colour, action):
+        """
+        Applies the action made by a player to the board.
+        """
+        from_tuple(action).apply_to(self.board)
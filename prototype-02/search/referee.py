@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+
+"""
+File: referee.py
+Contains a local stand-in for the referee of the full Expendibots game:
+two players (see player) take turns, white first, every action being
+checked against the legal actions of the player, and passed to both
+players by update. The game ends when a player has no pieces left (a
+draw if neither has), when the same position occurs for the fourth
+time, or after 250 turns of each player (both draws).
+Note: this file currently follows Python 3.7 syntax.
+Usage: python -m search.referee [--white alphabeta] [--black random]
+"""
+
+from .actions import from_tuple
+from .adversarial import OPPONENT, position_key
+from .artifacts import Board
+from .bitboard import BitBoard
+from .movegen import legal_actions
+from .player import START, AlphaBetaPlayer, RandomPlayer
+from collections import Counter
+from time import perf_counter
+import argparse
+
+__author__ = 'Natural Stupidity'
+__copyright__ = '© 2020 Natural Stupidity, Expendibots Game'
+__version__ = '1.0'
+__email__ = 'b.tran17@student.unimelb.edu.au'
+
+MAX_TURNS = 250
+MAX_REPETITIONS = 4
+
+
+def play(players, board_type=Board, max_turns=MAX_TURNS, verbose=False) -> dict:
+    """
+    Plays one game, and returns its result: the winner ('white', 'black',
+    or None for a draw), the reason the game ended, the number of turns
+    of white, the actions made, and the time used by each player.
+    An illegal action loses the game.
+    :param players: the players, by colour.
+    :param board_type: the board implementation of the referee.
+    :param max_turns: the maximum number of turns of each player.
+    :param verbose: whether every action is printed, with the line of
+    play expected by the player, if it has a principal_variation.
+    """
+    board = board_type(START)
+    colour = 'white'
+    positions = Counter([position_key(board, colour)])
+    actions = []
+    elapsed = {'white': 0.0, 'black': 0.0}
+    turns = 0
+    while True:
+        start = perf_counter()
+        action = players[colour].action()
+        elapsed[colour] += perf_counter() - start
+        try:
+            action = from_tuple(action).to_tuple()
+        except (ValueError, TypeError, IndexError):
+            action = None
+        if action not in [legal.to_tuple()
+                          for legal in legal_actions(board, colour)]:
+            return _result(OPPONENT[colour], 'illegal action {} by {}'
+                           .format(action, colour), turns, actions, elapsed)
+        if verbose:
+            # The line of play expected by a searching player.
+            line = players[colour].principal_variation() \
+                if hasattr(players[colour], 'principal_variation') else []
+            print('# {} {}: {}{}'.format(
+                turns + 1, colour, from_tuple(action),
+                ' Expects: {}'.format(' '.join(str(expected) for expected
+                                               in line[1:]))
+                if len(line) > 1 else ''))
+        from_tuple(action).apply_to(board)
+        actions.append(action)
+        for player in players.values():
+            player.update(colour, action)
+
+        whites, blacks = board.piece_count('white'), board.piece_count('black')
+        if whites == 0 or blacks == 0:
+            return _result(None if whites == blacks
+                           else 'white' if blacks == 0 else 'black',
+                           'no pieces left', turns + 1, actions, elapsed)
+        if colour == 'black':
+            turns += 1
+            if turns >= max_turns:
+                return _result(None, '{} turns'.format(max_turns), turns,
+                               actions, elapsed)
+        colour = OPPONENT[colour]
+        key = position_key(board, colour)
+        positions[key] += 1
+        if positions[key] >= MAX_REPETITIONS:
+            return _result(None, 'position repeated {} times'
+                           .format(MAX_REPETITIONS), turns, actions, elapsed)
+
+
+def _result(winner, reason, turns, actions, elapsed) -> dict:
+    return {'winner': winner, 'reason': reason, 'turns': turns,
+            'actions': actions,
+            'elapsed': {colour: round(seconds, 3)
+                        for (colour, seconds) in elapsed.items()}}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog='search.referee',
+        description='Plays games of Expendibots between two players.')
+    for colour in ('white', 'black'):
+        parser.add_argument('--' + colour, choices=('alphabeta', 'random'),
+                            default='alphabeta',
+                            help='the {} player (default alphabeta).'
+                            .format(colour))
+    parser.add_argument('--time-limit', type=float, default=1.0,
+                        help='the time of the search of every action of the '
+                             'alphabeta players, in seconds (default 1).')
+    parser.add_argument('--depth', type=int, default=None,
+                        help='the maximum depth of the search of the '
+                             'alphabeta players.')
+    parser.add_argument('--games', type=int, default=1,
+                        help='the number of games (default 1).')
+    parser.add_argument('--seed', type=int, default=2020,
+                        help='the seed of the random players (default 2020).')
+    parser.add_argument('--bitboard', action='store_true',
+                        help='use the bitboard implementation of the board.')
+    parser.add_argument('--verbose', action='store_true',
+                        help='print every action, and the line of play '
+                             'expected by the alphabeta players.')
+    args = parser.parse_args()
+
+    board_type = BitBoard if args.bitboard else Board
+    scores = Counter()
+    for game in range(0, args.games):
+        players = {}
+        for colour in ('white', 'black'):
+            if getattr(args, colour) == 'random':
+                players[colour] = RandomPlayer(colour, seed=args.seed + game,
+                                               board_type=board_type)
+            elif args.depth is None:
+                players[colour] = AlphaBetaPlayer(colour, args.time_limit,
+                                                  board_type=board_type)
+            else:
+                players[colour] = AlphaBetaPlayer(colour, args.time_limit,
+                                                  args.depth,
+                                                  board_type=board_type)
+        result = play(players, board_type, verbose=args.verbose)
+        scores[result['winner'] or 'draw'] += 1
+        print('Game {}: {} after {} turns ({}), {:.1f}s for white, '
+              '{:.1f}s for black.'.format(
+                  game + 1, 'draw' if result['winner'] is None
+                  else result['winner'] + ' wins', result['turns'],
+                  result['reason'], result['elapsed']['white'],
+                  result['elapsed']['black']))
+    print('White {}, black {}, draws {}.'.format(
+        scores['white'], scores['black'], scores['draw']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+
+"""
+File: stats.py
+Contains the statistics of the searches of the ArtificialPlayer: the
+nodes expanded and generated at every depth, the booms and moves
+generated, the heuristic evaluations, the probes of the transposition
+table and the tablebase, and the time of every iteration.
+Note: this file currently follows Python 3.7 syntax.
+"""
+
+from .actions import Boom
+from time import perf_counter
+
+__author__ = 'Natural Stupidity'
+__copyright__ = '© 2020 Natural Stupidity, Expendibots Game'
+__version__ = '1.0'
+__email__ = 'b.tran17@student.unimelb.edu.au'
+
+
+class SearchStats:
+    """
+    The statistics of the last search of an ArtificialPlayer created
+    with stats=True. The counters are reset by every search, and only
+    cover the nodes expanded by the search algorithm (not the states
+    followed by ArtificialPlayer.finish or replay).
+    """
+    __slots__ = ('expanded', 'generated', 'booms', 'moves', 'evaluations',
+                 'tt_hits', 'tt_misses', 'tablebase_hits', 'iterations',
+                 'elapsed', '_started', '_iteration_started', '_baseline')
+
+    def __init__(self):
+        self.expanded = {}
+        self.generated = {}
+        self.booms = 0
+        self.moves = 0
+        self.evaluations = 0
+        self.tt_hits = 0
+        self.tt_misses = 0
+        self.tablebase_hits = 0
+        # The (bound, nodes, elapsed time) of every iteration.
+        self.iterations = []
+        self.elapsed = 0.0
+        self._started = self._iteration_started = perf_counter()
+        self._baseline = (0, 0, 0)
+
+    @staticmethod
+    def _counters(player) -> tuple:
+        """
+        Returns the hits and misses of the transposition table, and the
+        hits of the tablebase of the player, so far.
+        """
+        table, tablebase = player.table, player.tablebase
+        return (0 if table is None else table.hits,
+                0 if table is None else table.misses,
+                0 if tablebase is None else tablebase.hits)
+
+    def start(self, player):
+        """
+        Resets the statistics, at the start of a search of the player.
+        """
+        self.__init__()
+        self._baseline = SearchStats._counters(player)
+
+    def end_iteration(self, bound, nodes):
+        """
+        Records the end of an iteration of the search.
+        :param bound: the bound (or the depth) of the iteration.
+        :param nodes: the number of nodes of the iteration.
+        """
+        now = perf_counter()
+        self.iterations.append((bound, nodes,
+                                round(now - self._iteration_started, 6)))
+        self._iteration_started = now
+
+    def finish(self, player):
+        """
+        Records the end of a search of the player.
+        """
+        self.elapsed = round(perf_counter() - self._started, 6)
+        counters = SearchStats._counters(player)
+        self.tt_hits, self.tt_misses, self.tablebase_hits = \
+            (now - before for (now, before) in zip(counters, self._baseline))
+
+    def count(self, state, next_states):
+        """
+        Yields the next states of an expanded state, counting them as
+        they are generated.
+        :param state: the state expanded.
+        :param next_states: its next states.
+        """
+        self.expanded[state.depth] = self.expanded.get(state.depth, 0) + 1
+        depth = state.depth + 1
+        for next_state in next_states:
+            self.generated[depth] = self.generated.get(depth, 0) + 1
+            if isinstance(next_state.action_taken, Boom):
+                self.booms += 1
+            else:
+                self.moves += 1
+            yield next_state
+
+    @property
+    def branching_factor(self) -> float:
+        """
+        The mean number of next states generated per state expanded.
+        """
+        expanded = sum(self.expanded.values())
+        return sum(self.generated.values()) / expanded if expanded else 0.0
+
+    def to_dict(self) -> dict:
+        """
+        Returns the statistics, as a dictionary of JSON types.
+        """
+        return {'expanded': {str(depth): n for (depth, n)
+                             in sorted(self.expanded.items())},
+                'generated': {str(depth): n for (depth, n)
+                              in sorted(self.generated.items())},
+                'branching_factor': round(self.branching_factor, 3),
+                'booms': self.booms,
+                'moves': self.moves,
+                'evaluations': self.evaluations,
+                'tt_hits': self.tt_hits,
+                'tt_misses': self.tt_misses,
+                'tablebase_hits': self.tablebase_hits,
+                'iterations': [list(iteration)
+                               for iteration in self.iterations],
+                'elapsed': self.elapsed}
+
+    def report(self) -> list:
+        """
+        Returns the statistics, as lines of text.
+        """
+        lines = ['{:.3f}s, {} states expanded, {} generated '
+                 '(branching factor {:.2f}), {} booms, {} moves.'
+                 .format(self.elapsed, sum(self.expanded.values()),
+                         sum(self.generated.values()), self.branching_factor,
+                         self.booms, self.moves),
+                 '{} heuristic evaluations, {} transposition hits, {} misses, '
+                 '{} tablebase hits.'
+                 .format(self.evaluations, self.tt_hits, self.tt_misses,
+                         self.tablebase_hits)]
+        for depth in sorted(set(self.expanded) | set(self.generated)):
+            lines.append('Depth {}: {} expanded, {} generated.'.format(
+                depth, self.expanded.get(depth, 0),
+                self.generated.get(depth, 0)))
+        for (i, (bound, nodes, elapsed)) in enumerate(self.iterations):
+            lines.append('Iteration {}: bound {}, {} nodes, {:.3f}s.'
+                         .format(i, bound, nodes, elapsed))
+        return lines
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+
+"""
+File: symmetry.py
+Contains the 8 symmetries of the square board (the rotations and the
+reflections), under which the rules and the goal of the game do not
+change. A board and its symmetric boards share one canonical key, the
+smallest of their Zobrist keys, so that the search algorithms only
+search one of them.
+Note: this file currently follows Python 3.7 syntax.
+"""
+
+from .actions import Move, Boom
+from .zobrist import ZOBRIST
+
+__author__ = 'Natural Stupidity'
+__copyright__ = '© 2020 Natural Stupidity, Expendibots Game'
+__version__ = '1.0'
+__email__ = 'b.tran17@student.unimelb.edu.au'
+
+SIZE = 8
+NUM_SQUARES = SIZE * SIZE
+LAST = SIZE - 1
+
+# The image of the coordinate (x, y) by each symmetry, the identity first.
+SYMMETRIES = (
+    lambda x, y: (x, y),
+    lambda x, y: (y, LAST - x),
+    lambda x, y: (LAST - x, LAST - y),
+    lambda x, y: (LAST - y, x),
+    lambda x, y: (LAST - x, y),
+    lambda x, y: (x, LAST - y),
+    lambda x, y: (y, x),
+    lambda x, y: (LAST - y, LAST - x),
+)
+
+# PERMUTATIONS[t][square] is the image of the square by the t-th symmetry.
+PERMUTATIONS = [[symmetry(*divmod(square, SIZE))[0] * SIZE
+                 + symmetry(*divmod(square, SIZE))[1]
+                 for square in range(0, NUM_SQUARES)]
+                for symmetry in SYMMETRIES]
+
+# INVERSES[t] is the symmetry undoing the t-th symmetry.
+INVERSES = [next(u for u in range(0, len(SYMMETRIES))
+                 if all(PERMUTATIONS[u][PERMUTATIONS[t][square]] == square
+                        for square in range(0, NUM_SQUARES)))
+            for t in range(0, len(SYMMETRIES))]
+
+
+def canonicalise(board) -> tuple:
+    """
+    Returns the canonical key of the board, and the symmetry t taking
+    the board to its canonical form: the canonical key is the Zobrist
+    key of the t-th symmetric board, the smallest of the 8 keys.
+    :param board: the board, either artifacts.Board or bitboard.BitBoard.
+    """
+    keys = [0] * len(SYMMETRIES)
+    stacks = board.classify_mark()
+    for color in ('white', 'black'):
+        zobrist = ZOBRIST[color]
+        for (n, x, y) in stacks[color]:
+            square = x * SIZE + y
+            for (t, permutation) in enumerate(PERMUTATIONS):
+                keys[t] ^= zobrist[permutation[square]][n]
+    key = min(keys)
+    return key, keys.index(key)
+
+
+def canonical_key(board) -> int:
+    """
+    Returns the canonical key of the board, shared by the 8 symmetric
+    boards (see canonicalise).
+    :param board: the board, either artifacts.Board or bitboard.BitBoard.
+    """
+    return canonicalise(board)[0]
+
+
+def transform_coord(coord, t) -> tuple:
+    """
+    Returns the image of the coordinate (x, y) by the t-th symmetry.
+    """
+    return SYMMETRIES[t](coord[0], coord[1])
+
+
+def transform_action(action, t):
+    """
+    Returns the image of the action by the t-th symmetry: the action
+    played on the symmetric board. An action found on the canonical
+    form of a board is taken back to the board by the inverse symmetry,
+    INVERSES[t].
+    :param action: a Move or a Boom.
+    :param t: the index of the symmetry.
+    """
+    if isinstance(action, Boom):
+        return Boom(transform_coord(action.origin, t))
+    return Move(action.n, transform_coord(action.origin, t),
+                transform_coord(action.destination, t))
+
+
+def transform_actions(actions, t) -> list:
+    """
+    Returns the images of a sequence of actions by the t-th symmetry.
+    """
+    return [transform_action(action, t) for action in actions]
@@ -0,0 +1,305 @@
+#!/usr/bin/env python
+
+"""
+File: tablebase.py
+Contains the endgame tablebase of the ArtificialPlayer: the number of
+actions winning the game (the distance to win) from every board with
+at most a few pieces, computed backwards from the won boards, written
+to a file, and read through mmap, so that the worker processes share
+one copy of the table in the page cache.
+A board of the tablebase is made of w white pieces, stacked in any way,
+and b black stacks, with w + b at most the piece budget. The height of
+the black stacks never matters: they never move, and a boom removes
+whole stacks.
+Note: this file currently follows Python 3.7 syntax.
+To build a tablebase: python -m search.tablebase PATH [--pieces N]
+"""
+
+from .movegen import MAX_DISTANCE, NEIGHBOURS, TARGETS
+from collections import Counter
+from itertools import combinations, combinations_with_replacement
+from math import inf
+import argparse
+import mmap
+import struct
+
+__author__ = 'Natural Stupidity'
+__copyright__ = '© 2020 Natural Stupidity, Expendibots Game'
+__version__ = '1.0'
+__email__ = 'b.tran17@student.unimelb.edu.au'
+
+NUM_SQUARES = 64
+MAGIC = b'EXPTBASE'
+FORMAT_VERSION = 1
+# The header: magic, format version, piece budget.
+HEADER = struct.Struct('<8sII')
+# The value of the boards that cannot be won.
+NO_WIN = 255
+DEFAULT_PIECES = 3
+
+
+def _binomials(n_max, k_max) -> list:
+    """
+    Returns the table of the binomial coefficients C(n, k), for n up to
+    n_max and k up to k_max.
+    """
+    table = [[0] * (k_max + 1) for _ in range(0, n_max + 1)]
+    for n in range(0, n_max + 1):
+        table[n][0] = 1
+        for k in range(1, min(n, k_max) + 1):
+            table[n][k] = table[n - 1][k - 1] + table[n - 1][k]
+    return table
+
+
+def sections_of(budget) -> dict:
+    """
+    Returns the sections of a tablebase, by (w, b): the offset of the
+    section in the values, and the number of its boards. The white
+    pieces are placed on the squares with repetition (stars and bars,
+    C(64 + w - 1, w) ways), the black stacks on distinct squares
+    (C(64, b) ways), overlaps included.
+    :param budget: the piece budget of the tablebase.
+    """
+    binomial = _binomials(NUM_SQUARES + budget, budget)
+    sections = {}
+    offset = 0
+    for w in range(1, budget):
+        for b in range(1, budget - w + 1):
+            size = binomial[NUM_SQUARES + w - 1][w] * binomial[NUM_SQUARES][b]
+            sections[(w, b)] = (offset, size)
+            offset += size
+    return sections
+
+
+class _Index:
+    """
+    The perfect index of the boards of a tablebase: the position of
+    the value of a board among the values.
+    """
+
+    def __init__(self, budget):
+        self.budget = budget
+        self.sections = sections_of(budget)
+        self.binomial = _binomials(NUM_SQUARES + budget, budget)
+        self.size = sum(size for (_, size) in self.sections.values())
+
+    def __call__(self, whites, blacks):
+        """
+        Returns the index of the board, or None if it is not in the
+        tablebase.
+        :param whites: the squares of the white pieces, sorted, a square
+        appearing once per piece of its stack.
+        :param blacks: the squares of the black stacks, sorted.
+        """
+        section = self.sections.get((len(whites), len(blacks)))
+        if section is None:
+            return None
+        binomial = self.binomial
+        # The ranks of the combinations, in the combinatorial number
+        # system: with repetition, the i-th square is shifted by i.
+        white_rank = 0
+        for (i, square) in enumerate(whites):
+            white_rank += binomial[square + i][i + 1]
+        black_rank = 0
+        for (i, square) in enumerate(blacks):
+            black_rank += binomial[square][i + 1]
+        return section[0] + white_rank * binomial[NUM_SQUARES][len(blacks)] \
+            + black_rank
+
+
+def _explosion(square, occupied) -> set:
+    """
+    Returns the squares of the 8-connected group of the occupied squares
+    holding the square, removed by a boom at the square.
+    """
+    region, frontier = {square}, [square]
+    while frontier:
+        current = frontier.pop()
+        for neighbour in NEIGHBOURS[current]:
+            if neighbour in occupied and neighbour not in region:
+                region.add(neighbour)
+                frontier.append(neighbour)
+    return region
+
+
+def _moves(whites, blacks) -> list:
+    """
+    Returns the white squares after every legal move of the white player.
+    """
+    result = []
+    stacks = Counter(whites)
+    for (square, height) in stacks.items():
+        for distance in range(1, min(height, MAX_DISTANCE) + 1):
+            for target in TARGETS[square][distance]:
+                if target in blacks:
+                    continue
+                for n in range(1, height + 1):
+                    moved = list(whites)
+                    for _ in range(0, n):
+                        moved.remove(square)
+                    result.append(tuple(sorted(moved + [target] * n)))
+    return result
+
+
+def _booms(whites, blacks) -> list:
+    """
+    Returns the (white squares, black squares) after every boom.
+    """
+    result = []
+    occupied = set(whites) | set(blacks)
+    for square in sorted(set(whites)):
+        region = _explosion(square, occupied)
+        result.append((tuple(w for w in whites if w not in region),
+                       tuple(b for b in blacks if b not in region)))
+    return result
+
+
+def build(budget=DEFAULT_PIECES, path=None, verbose=False) -> bytearray:
+    """
+    Computes the distance to win of every board of the tablebase, and
+    writes the tablebase to the file if a path is given. The sections
+    are computed by increasing number of white pieces: a boom removes
+    at least one white piece, so the boards after a boom are in a section
+    computed before. Within a section, the moves never change the black
+    stacks, so the boards sharing their black stacks are solved together,
+    from the values given by the booms, by a breadth first search along
+    the moves taken backwards.
+    :param budget: the maximum number of white pieces plus black stacks.
+    :param path: the path of the tablebase file, or None.
+    :param verbose: whether the progress is printed.
+    :return: the values of the tablebase.
+    """
+    index = _Index(budget)
+    values = bytearray([NO_WIN]) * index.size
+    for (w, b) in sorted(index.sections):
+        for blacks in combinations(range(0, NUM_SQUARES), b):
+            black_set = set(blacks)
+            boards = [whites for whites
+                      in combinations_with_replacement(range(0, NUM_SQUARES), w)
+                      if not black_set.intersection(whites)]
+            local = {whites: i for (i, whites) in enumerate(boards)}
+            distances = [inf] * len(boards)
+            parents = [[] for _ in boards]
+            for (i, whites) in enumerate(boards):
+                for (next_whites, next_blacks) in _booms(whites, blacks):
+                    if not next_blacks:
+                        distances[i] = 1
+                        break
+                    if next_whites:
+                        value = values[index(next_whites, next_blacks)]
+                        if value != NO_WIN:
+                            distances[i] = min(distances[i], value + 1)
+                for next_whites in _moves(whites, black_set):
+                    parents[local[next_whites]].append(i)
+
+            # Breadth first search along the moves taken backwards,
+            # from the boards sorted by their distance after the booms.
+            buckets = {}
+            for (i, distance) in enumerate(distances):
+                if distance < inf:
+                    buckets.setdefault(distance, []).append(i)
+            distance = 1
+            while buckets:
+                for i in buckets.pop(distance, []):
+                    if distances[i] != distance:
+                        continue
+                    for parent in parents[i]:
+                        if distances[parent] > distance + 1:
+                            distances[parent] = distance + 1
+                            buckets.setdefault(distance + 1, []).append(parent)
+                distance += 1
+            for (i, whites) in enumerate(boards):
+                if distances[i] < NO_WIN:
+                    values[index(whites, blacks)] = distances[i]
+        if verbose:
+            print('# Section of {} white pieces and {} black stacks done.'
+                  .format(w, b))
+    if path is not None:
+        with open(path, 'wb') as file:
+            file.write(HEADER.pack(MAGIC, FORMAT_VERSION, budget))
+            file.write(values)
+    return values
+
+
+class Tablebase:
+    """
+    A tablebase file, read through mmap: the values are read from the
+    page cache, without being copied, and shared by all the processes
+    reading the same file. The tablebase can be given to worker
+    processes: each process maps the file again.
+    """
+
+    def __init__(self, path):
+        """
+        :param path: the path of the tablebase file (see build).
+        """
+        self.path = path
+        self.hits = 0
+        self._open()
+
+    def _open(self):
+        with open(self.path, 'rb') as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, budget = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError('{} is not a tablebase of version {}.'
+                             .format(self.path, FORMAT_VERSION))
+        self.budget = budget
+        self._index = _Index(budget)
+        if len(self._mmap) != HEADER.size + self._index.size:
+            raise ValueError('{} is truncated.'.format(self.path))
+
+    def __getstate__(self) -> dict:
+        state = dict(self.__dict__)
+        del state['_mmap']
+        del state['_index']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._open()
+
+    def __str__(self) -> str:
+        return 'Tablebase({}, {} pieces, {} hits)'.format(
+            self.path, self.budget, self.hits)
+
+    def probe(self, board):
+        """
+        Returns the distance to win of the board (inf if it cannot be
+        won), or None if it has too many pieces for the tablebase.
+        :param board: the board, either artifacts.Board or bitboard.BitBoard.
+        """
+        num_whites = board.piece_count('white')
+        if num_whites >= self.budget:
+            return None
+        if num_whites == 0:
+            return 0 if board.piece_count('black') == 0 else inf
+        stacks = board.classify_mark()
+        if len(stacks['black']) + num_whites > self.budget:
+            return None
+        if not stacks['black']:
+            return 0
+        whites = []
+        for (n, x, y) in stacks['white']:
+            whites.extend([x * 8 + y] * n)
+        whites.sort()
+        blacks = sorted(x * 8 + y for (_, x, y) in stacks['black'])
+        self.hits += 1
+        value = self._mmap[HEADER.size + self._index(whites, blacks)]
+        return inf if value == NO_WIN else value
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog='search.tablebase',
+        description='Builds the endgame tablebase of the Expendibots boards.')
+    parser.add_argument('path', help='the tablebase file written.')
+    parser.add_argument('--pieces', type=int, default=DEFAULT_PIECES,
+                        help='the maximum number of white pieces plus black '
+                             'stacks (default {}).'.format(DEFAULT_PIECES))
+    args = parser.parse_args()
+    build(args.pieces, args.path, verbose=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,601 @@
+import unittest
+
+from . import vectorised
+from .actions import from_int, from_tuple
+from .adversarial import OPPONENT, WIN, AlphaBeta, evaluate
+from .artifacts import ArtificialPlayer, Board
+from .batch import run_batch, solve
+from .bench import compare
+from .bitboard import BitBoard
+from .cache import SolutionCache
+from .generator import generate
+from .heuristics import admissible_estimate
+from .movegen import legal_actions
+from .parallel import parallel_search
+from .player import START, AlphaBetaPlayer
+from .symmetry import SYMMETRIES, canonical_key
+from .tablebase import Tablebase, build
+from .transposition import TranspositionTable
+from io import StringIO
+from math import inf
+from random import Random
+from tempfile import TemporaryDirectory
+from time import perf_counter
+import json
+import os
+
+
+def data_of(board) -> dict:
+    """
+    Returns the dictionary data type of the board, to build a new board.
+    """
+    return {color: [list(stack) for stack in stacks]
+            for (color, stacks) in board.classify_mark().items()}
+
+
+def shortest_win(board) -> float:
+    """
+    Returns the number of white actions winning the game from the board
+    (inf if it cannot be won), by a breadth first search.
+    """
+    frontier, seen, distance = [board], {board.key}, 0
+    while frontier:
+        next_frontier = []
+        for state in frontier:
+            if state.piece_count('black') == 0:
+                return distance
+            for action in legal_actions(state, 'white'):
+                next_state = state.copy()
+                action.apply_to(next_state)
+                if next_state.key not in seen:
+                    seen.add(next_state.key)
+                    next_frontier.append(next_state)
+        frontier, distance = next_frontier, distance + 1
+    return inf
+
+
+def minimax(board, color, depth, ply=0) -> int:
+    """
+    Returns the negamax score of the board searched to the given depth,
+    without pruning (see AlphaBeta._negamax).
+    """
+    own = board.piece_count(color)
+    other = board.piece_count(OPPONENT[color])
+    if own == 0 or other == 0:
+        return 0 if own == other else WIN - ply if other == 0 else ply - WIN
+    if depth <= 0:
+        return evaluate(board, color)
+    scores = []
+    for action in legal_actions(board, color):
+        undo_entry = action.apply_to(board)
+        scores.append(-minimax(board, OPPONENT[color], depth - 1, ply + 1))
+        board.unmake(undo_entry)
+    return max(scores) if scores else evaluate(board, color)
+
+
+class BoardTest(unittest.TestCase):
+    """
+    Board and BitBoard, playing the same random games.
+    """
+
+    def assertSameBoard(self, board, bitboard):
+        self.assertEqual(board.key, bitboard.key)
+        self.assertEqual(board.classify_mark(), bitboard.classify_mark())
+        self.assertEqual(sorted(sorted(c) for c in board.components()),
+                         sorted(sorted(c) for c in bitboard.components()))
+        for color in ('white', 'black'):
+            self.assertEqual(board.piece_count(color),
+                             bitboard.piece_count(color))
+            self.assertEqual(
+                [action.to_tuple() for action in legal_actions(board, color)],
+                [action.to_tuple()
+                 for action in legal_actions(bitboard, color)])
+        self.assertEqual(board.heuristic_value, bitboard.heuristic_value)
+        self.assertEqual(board.heuristic_value,
+                         Board(data_of(board)).heuristic_value)
+
+    def test_random_games(self):
+        random = Random(2020)
+        for game in range(0, 10):
+            data = START if game == 0 else generate(6, 6, (3, 1), 0.3, game)
+            board, bitboard = Board(data), BitBoard(data)
+            start = board.key
+            undo_entries = []
+            color = 'white'
+            for _ in range(0, 30):
+                self.assertSameBoard(board, bitboard)
+                actions = list(legal_actions(board, color))
+                if not actions:
+                    break
+                action = random.choice(actions)
+                undo_entries.append((action.apply_to(board),
+                                     action.apply_to(bitboard)))
+                color = OPPONENT[color]
+            for (undo_entry, bit_undo_entry) in reversed(undo_entries):
+                board.unmake(undo_entry)
+                bitboard.unmake(bit_undo_entry)
+                self.assertSameBoard(board, bitboard)
+            self.assertEqual(board.key, start)
+
+
+class MoveTest(unittest.TestCase):
+    DATA = {'white': [[3, 2, 2]], 'black': [[1, 6, 6]]}
+
+    def test_diagonal_move(self):
+        for board_type in (Board, BitBoard):
+            board = board_type(MoveTest.DATA)
+            key = board.key
+            with self.assertRaises(ValueError):
+                board.make_move(2, 2, 1, 3, 3)
+            self.assertEqual(board.key, key)
+            self.assertEqual(board.piece_count('white'), 3)
+
+    def test_orthogonal_move(self):
+        for board_type in (Board, BitBoard):
+            board = board_type(MoveTest.DATA)
+            key = board.key
+            undo_entry = board.make_move(2, 2, 2, 2, 5)
+            self.assertNotEqual(board.key, key)
+            board.unmake(undo_entry)
+            self.assertEqual(board.key, key)
+
+
+class IdaTest(unittest.TestCase):
+    MIN = {'white': [[1, 5, 3]], 'black': [[2, 4, 6], [1, 3, 1], [1, 5, 1]]}
+
+    def test_optimal(self):
+        for seed in range(0, 8):
+            data = generate(2, 3, (2, 1), 0.4, seed + 20)
+            player = ArtificialPlayer(data, heuristic='admissible')
+            goal = player.search(engine='ida', time_limit=10)
+            self.assertIsNone(player.limit)
+            self.assertEqual(goal.depth, shortest_win(BitBoard(data)))
+
+    def test_unsolvable(self):
+        for heuristic in ArtificialPlayer.HEURISTICS:
+            player = ArtificialPlayer(IdaTest.MIN, heuristic=heuristic)
+            self.assertIsNone(player.search(engine='ida', time_limit=10))
+            self.assertIsNone(player.limit)
+
+    def test_depth_limit(self):
+        data = generate(2, 3, (2, 1), 0.4, 2)
+        player = ArtificialPlayer(data, heuristic='admissible')
+        self.assertEqual(player.search(engine='ida').depth, 5)
+        self.assertIsNone(player.search(4, 'ida', time_limit=10))
+        self.assertIsNone(player.limit)
+
+
+class TranspositionTableTest(unittest.TestCase):
+
+    def test_clear(self):
+        for policy in TranspositionTable.POLICIES:
+            table = TranspositionTable(16, policy)
+            for key in range(0, 40):
+                table.store(key, key % 5, key)
+            table.clear()
+            self.assertEqual(len(table), 0)
+            self.assertEqual(set(table.depths), {0})
+            self.assertIsNone(table.probe(3))
+            table.store(3, 0, 'shallow')
+            self.assertEqual(table.probe(3), (0, 'shallow'))
+
+
+class TranspositionIdaTest(unittest.TestCase):
+    """
+    IDA* with and without a transposition table.
+    """
+    SEEDS = (0, 2, 8, 12, 20, 21, 27, 28)
+
+    def test_same_result(self):
+        for seed in TranspositionIdaTest.SEEDS:
+            data = generate(2, 3, (2, 1), 0.4, seed)
+            for heuristic in ArtificialPlayer.HEURISTICS:
+                depths = []
+                for table_size in (0, TranspositionTable.DEFAULT_SIZE):
+                    player = ArtificialPlayer(data, table_size=table_size,
+                                              heuristic=heuristic)
+                    goal = player.search(engine='ida')
+                    depths.append(goal.depth)
+                self.assertEqual(depths[0], depths[1])
+
+    def test_depth_limit(self):
+        for seed in TranspositionIdaTest.SEEDS:
+            data = generate(2, 3, (2, 1), 0.4, seed)
+            optimum = shortest_win(BitBoard(data))
+            player = ArtificialPlayer(data)
+            self.assertIsNone(player.search(optimum - 2, 'ida',
+                                            time_limit=10))
+            self.assertIsNone(player.limit)
+
+    def test_engines_in_turn(self):
+        for seed in TranspositionIdaTest.SEEDS:
+            data = generate(2, 3, (2, 1), 0.4, seed)
+            optimum = shortest_win(BitBoard(data))
+            player = ArtificialPlayer(data, heuristic='admissible')
+            for engine in ('ids', 'ida', 'ids', 'ida'):
+                goal = player.search(engine=engine)
+                self.assertEqual(goal.depth, optimum)
+
+
+class BestFirstTest(unittest.TestCase):
+
+    def test_astar_optimal(self):
+        for seed in range(0, 8):
+            data = generate(2, 3, (2, 1), 0.4, seed + 20)
+            for board_type in (Board, BitBoard):
+                player = ArtificialPlayer(data, board_type,
+                                          heuristic='admissible')
+                goal = player.search(engine='astar', time_limit=10)
+                self.assertIsNone(player.limit)
+                self.assertEqual(goal.depth, shortest_win(BitBoard(data)))
+
+    def test_plans(self):
+        for seed in range(0, 8):
+            data = generate(2, 3, (2, 1), 0.4, seed + 20)
+            for engine in ('wastar', 'beam'):
+                player = ArtificialPlayer(data)
+                goal = player.search(engine=engine, time_limit=10)
+                board = BitBoard(data)
+                for action in goal.path():
+                    action.apply_to(board)
+                self.assertEqual(board.piece_count('black'), 0)
+
+    def test_unsolvable(self):
+        for engine in ('astar', 'wastar', 'beam'):
+            player = ArtificialPlayer(IdaTest.MIN)
+            self.assertIsNone(player.search(engine=engine, time_limit=10))
+            self.assertIsNone(player.limit)
+
+
+@unittest.skipUnless(vectorised.available(), 'requires NumPy')
+class VectorisedTest(unittest.TestCase):
+
+    def test_same_heuristics(self):
+        for seed in range(0, 8):
+            player = ArtificialPlayer(generate(2, 3, (2, 1), 0.4, seed + 20),
+                                      vectorised=True)
+            scored = list(player.expand_scored(player.start_state))
+            self.assertEqual(len(scored),
+                             len(list(player.expand(player.start_state))))
+            for next_state, estimate in scored:
+                self.assertEqual(estimate, player.heuristic(next_state))
+
+    def test_same_results(self):
+        for seed in range(0, 8):
+            data = generate(2, 3, (2, 1), 0.4, seed + 20)
+            for engine in ('ids', 'ida'):
+                plain = ArtificialPlayer(data)
+                batched = ArtificialPlayer(data, vectorised=True)
+                self.assertEqual(plain.search(engine=engine).depth,
+                                 batched.search(engine=engine).depth)
+                self.assertEqual(plain.iterations, batched.iterations)
+            for engine in ('astar', 'beam'):
+                player = ArtificialPlayer(data, vectorised=True)
+                goal = player.search(engine=engine, time_limit=10)
+                board = BitBoard(data)
+                for action in goal.path():
+                    action.apply_to(board)
+                self.assertEqual(board.piece_count('black'), 0)
+
+
+class HeuristicTest(unittest.TestCase):
+
+    def test_admissible(self):
+        for seed in range(0, 20):
+            board = BitBoard(generate(1 + seed % 2, 1 + seed % 3, (2, 1),
+                                      0.5, seed))
+            estimate, optimum = admissible_estimate(board), shortest_win(board)
+            self.assertLessEqual(estimate, optimum)
+
+
+class SymmetryTest(unittest.TestCase):
+
+    def test_canonical_key(self):
+        for seed in range(0, 10):
+            data = generate(5, 5, (2, 1), 0.3, seed)
+            key = canonical_key(Board(data))
+            for symmetry in SYMMETRIES:
+                image = {color: [[n] + list(symmetry(x, y))
+                                 for (n, x, y) in stacks]
+                         for (color, stacks) in data.items()}
+                self.assertEqual(canonical_key(Board(image)), key)
+                self.assertEqual(canonical_key(BitBoard(image)), key)
+
+
+class ParallelTest(unittest.TestCase):
+
+    def test_deterministic(self):
+        for seed in (20, 21, 27):
+            data = generate(2, 3, (2, 1), 0.4, seed)
+            serial = ArtificialPlayer(data).search()
+            plans = [[action.to_tuple() for action in
+                      parallel_search(data, {}, workers, plies,
+                                      deterministic=True)[0]]
+                     for (workers, plies) in ((1, 1), (3, 1), (2, 2))]
+            self.assertEqual(plans[0], plans[1])
+            self.assertEqual(len(plans[0]), serial.depth)
+            self.assertEqual(len(plans[2]), serial.depth)
+
+
+class TablebaseTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = TemporaryDirectory()
+        path = os.path.join(cls.directory.name, 'tablebase')
+        build(3, path)
+        cls.tablebase = Tablebase(path)
+
+    @classmethod
+    def tearDownClass(cls):
+        del cls.tablebase
+        cls.directory.cleanup()
+
+    def test_shortest_win(self):
+        for seed in range(0, 20):
+            whites, blacks = (2, 1) if seed % 2 else (1, 2)
+            board = BitBoard(generate(whites, blacks, seed=seed))
+            self.assertEqual(self.tablebase.probe(board), shortest_win(board))
+
+    def test_too_many_pieces(self):
+        self.assertIsNone(self.tablebase.probe(BitBoard(START)))
+
+
+class BatchTest(unittest.TestCase):
+
+    def test_round_trip(self):
+        boards = [generate(2, 3, (2, 1), 0.4, seed) for seed in (20, 21, 27)]
+        with TemporaryDirectory() as directory:
+            for (i, data) in enumerate(boards[:2]):
+                with open(os.path.join(directory, '{}.json'.format(i)),
+                          'w') as file:
+                    json.dump(data, file)
+            with open(os.path.join(directory, 'broken.json'), 'w') as file:
+                file.write('{')
+            lines = os.path.join(directory, 'boards.jsonl')
+            with open(lines, 'w') as file:
+                file.write(json.dumps(boards[2]) + '\n\nnot json\n')
+            for workers in (1, 2):
+                output = StringIO()
+                counts = run_batch([directory, lines], {}, {}, workers,
+                                   output=output)
+                results = {result['id']: result for result in
+                           map(json.loads, output.getvalue().splitlines())}
+                self.assertEqual(counts['solved'], 3)
+                self.assertEqual(counts['error'], 2)
+                self.assertEqual(
+                    sorted(results),
+                    sorted([os.path.join(directory, name) for name in
+                            ('0.json', '1.json', 'broken.json')]
+                           + [lines + ':1', lines + ':3']))
+                for (data, puzzle_id) in zip(boards, (
+                        os.path.join(directory, '0.json'),
+                        os.path.join(directory, '1.json'), lines + ':1')):
+                    result = results[puzzle_id]
+                    self.assertEqual(result['status'], 'solved')
+                    board = BitBoard(data)
+                    for action in result['actions']:
+                        from_tuple(action).apply_to(board)
+                    self.assertEqual(board.piece_count('black'), 0)
+                self.assertIn('error', results[lines + ':3'])
+
+    def test_partial(self):
+        data = generate(2, 3, (2, 1), 0.4, 20)
+        result = json.loads(json.dumps(solve('id', data, {}, {},
+                                             node_limit=3)))
+        self.assertEqual(result['status'], 'node-limit')
+        board = BitBoard(data)
+        for action in result['partial']:
+            from_tuple(action).apply_to(board)
+        self.assertEqual(board.piece_count('black'), result['blacks_left'])
+
+
+class CacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'cache.db')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_symmetric_hit(self):
+        data = generate(2, 3, (2, 1), 0.4, 21)
+        cache = SolutionCache(self.path)
+        first = solve('first', data, {'cache': cache}, {})
+        self.assertNotIn('cached', first)
+        self.assertGreater(first['nodes'], 0)
+        for symmetry in SYMMETRIES:
+            image = {color: [[n] + list(symmetry(x, y))
+                             for (n, x, y) in stacks]
+                     for (color, stacks) in data.items()}
+            result = solve('image', image, {'cache': cache}, {})
+            self.assertTrue(result['cached'])
+            self.assertEqual(result['nodes'], first['nodes'])
+            self.assertEqual(len(result['actions']), len(first['actions']))
+            board = BitBoard(image)
+            for action in result['actions']:
+                from_tuple(action).apply_to(board)
+            self.assertEqual(board.piece_count('black'), 0)
+        self.assertEqual(cache.hits, len(SYMMETRIES))
+
+    def test_settings(self):
+        data = generate(2, 3, (2, 1), 0.4, 21)
+        cache = SolutionCache(self.path)
+        solve('first', data, {'cache': cache}, {})
+        for options in ({'symmetry': True}, {'heuristic': 'admissible'}):
+            options['cache'] = cache
+            self.assertNotIn('cached', solve('other', data, options, {}))
+        self.assertNotIn('cached', solve('other', data, {'cache': cache},
+                                         {'max_depth': 20}))
+
+    def test_version(self):
+        data = generate(2, 3, (2, 1), 0.4, 21)
+        solve('first', data, {'cache': SolutionCache(self.path)}, {})
+        self.assertTrue(solve('same', data,
+                              {'cache': SolutionCache(self.path)},
+                              {})['cached'])
+        cache = SolutionCache(self.path, version='other')
+        self.assertEqual(len(cache), 0)
+        self.assertNotIn('cached', solve('other', data, {'cache': cache}, {}))
+
+
+class ActionTest(unittest.TestCase):
+
+    def test_round_trip(self):
+        for seed in range(0, 10):
+            board = BitBoard(generate(6, 6, (3, 2, 1), 0.3, seed))
+            codes = set()
+            for action in legal_actions(board, 'white'):
+                code = action.to_int()
+                self.assertNotIn(code, codes | {0})
+                codes.add(code)
+                self.assertEqual(from_int(code).to_tuple(), action.to_tuple())
+                self.assertEqual(from_int(code).to_int(), code)
+                self.assertEqual(from_tuple(json.loads(json.dumps(
+                    action.to_tuple()))).to_tuple(), action.to_tuple())
+
+
+class BenchTest(unittest.TestCase):
+    BASELINE = {'results': [
+        {'id': 'a', 'config': 'ids', 'status': 'solved', 'length': 3,
+         'nodes': 1000, 'elapsed': 1.0, 'peak_rss_kib': 20000},
+        {'id': 'b', 'config': 'ids', 'status': 'time-limit', 'length': None,
+         'nodes': 1000, 'elapsed': 1.0, 'peak_rss_kib': 20000},
+        {'id': 'c', 'config': 'ids', 'status': 'solved', 'length': 3,
+         'nodes': 10, 'elapsed': 0.01, 'peak_rss_kib': 2000}]}
+
+    def current(self, **changes):
+        return {'results': [dict(result, **changes.get(result['id'], {}))
+                            for result in BenchTest.BASELINE['results']]}
+
+    def test_same(self):
+        self.assertEqual(compare(BenchTest.BASELINE, self.current()), [])
+
+    def test_within_tolerance(self):
+        current = self.current(a={'nodes': 1150, 'elapsed': 1.15},
+                               b={'nodes': 5000, 'elapsed': 1.05})
+        self.assertEqual(compare(BenchTest.BASELINE, current), [])
+
+    def test_within_noise(self):
+        current = self.current(c={'elapsed': 0.04, 'peak_rss_kib': 2900})
+        self.assertEqual(compare(BenchTest.BASELINE, current), [])
+
+    def test_regressions(self):
+        current = self.current(a={'nodes': 1500, 'elapsed': 1.5,
+                                  'peak_rss_kib': 30000},
+                               c={'status': 'failed', 'length': None})
+        self.assertEqual(len(compare(BenchTest.BASELINE, current)), 4)
+        current = self.current(a={'length': 4})
+        self.assertEqual(len(compare(BenchTest.BASELINE, current)), 1)
+
+
+class StatsTest(unittest.TestCase):
+
+    def test_counters(self):
+        for seed in (20, 21, 27):
+            data = generate(2, 3, (2, 1), 0.4, seed)
+            plain = ArtificialPlayer(data)
+            player = ArtificialPlayer(data, stats=True)
+            for engine in ('ids', 'astar'):
+                self.assertEqual(plain.search(engine=engine).depth,
+                                 player.search(engine=engine).depth)
+                self.assertEqual(plain.iterations, player.iterations)
+                stats = player.stats.to_dict()
+                self.assertEqual([iteration[:2]
+                                  for iteration in stats['iterations']],
+                                 [list(iteration)
+                                  for iteration in player.iterations])
+                self.assertEqual(stats['booms'] + stats['moves'],
+                                 sum(stats['generated'].values()))
+                if engine == 'ids':
+                    self.assertGreater(stats['tt_hits'] + stats['tt_misses'],
+                                       0)
+                else:
+                    self.assertEqual(stats['expanded']['0'], 1)
+                    self.assertEqual(stats['generated']['1'], len(list(
+                        player.get_next_states(player.start_state))))
+                    self.assertEqual(stats['tt_hits'] + stats['tt_misses'], 0)
+
+    def test_reset(self):
+        player = ArtificialPlayer(generate(2, 3, (2, 1), 0.4, 27), stats=True)
+        counts = []
+        for _ in range(0, 2):
+            player.search()
+            stats = player.stats.to_dict()
+            del stats['elapsed']
+            stats['iterations'] = [iteration[:2]
+                                   for iteration in stats['iterations']]
+            counts.append(stats)
+        self.assertEqual(counts[0], counts[1])
+
+
+class BudgetTest(unittest.TestCase):
+    DATA = generate(3, 12, seed=5)
+
+    def test_node_limit(self):
+        for engine in ArtificialPlayer.ENGINES:
+            player = ArtificialPlayer(BudgetTest.DATA)
+            self.assertIsNone(player.search(engine=engine, node_limit=100))
+            self.assertEqual(player.limit, 'node-limit')
+            self.assertEqual(sum(n for (_, n) in player.iterations), 100)
+            self.assertIsNotNone(player.partial)
+
+    def test_time_limit(self):
+        for engine in ('ida', 'astar'):
+            player = ArtificialPlayer(BudgetTest.DATA, heuristic='admissible')
+            start = perf_counter()
+            self.assertIsNone(player.search(engine=engine, time_limit=0.1))
+            self.assertLess(perf_counter() - start, 0.3)
+            self.assertEqual(player.limit, 'time-limit')
+            self.assertIsNotNone(player.partial)
+
+
+class AlphaBetaTest(unittest.TestCase):
+
+    def test_minimax(self):
+        for seed in range(0, 6):
+            data = generate(3, 3, (2, 1), 0.3, seed)
+            for board_type in (Board, BitBoard):
+                for color in ('white', 'black'):
+                    for depth in (1, 2, 3):
+                        board = board_type(data)
+                        engine = AlphaBeta()
+                        action = engine.search(board, color, max_depth=depth)
+                        searched, score, _ = engine.iterations[-1]
+                        self.assertEqual(score,
+                                         minimax(board, color, searched))
+                        action.apply_to(board)
+                        self.assertEqual(-minimax(board, OPPONENT[color],
+                                                  searched - 1, 1), score)
+
+
+class PrincipalVariationTest(unittest.TestCase):
+
+    def setUp(self):
+        self.player = AlphaBetaPlayer('white', time_limit=None, max_depth=3)
+
+    def test_starts_with_action(self):
+        action = self.player.action()
+        line = self.player.principal_variation()
+        self.assertGreaterEqual(len(line), 1)
+        self.assertEqual(line[0].to_tuple(), action)
+
+    def test_legal_line(self):
+        self.player.action()
+        board = self.player.board
+        key = board.key
+        colour = 'white'
+        undo_entries = []
+        for action in self.player.principal_variation():
+            self.assertIn(action.to_tuple(), [legal.to_tuple() for legal
+                                              in legal_actions(board, colour)])
+            undo_entries.append(action.apply_to(board))
+            colour = OPPONENT[colour]
+        for undo_entry in reversed(undo_entries):
+            board.unmake(undo_entry)
+        self.assertEqual(board.key, key)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+
+"""
+File: transposition.py
+Contains the transposition table used by the search algorithms, so
+that the same board reached by different sequences of actions is not
+searched again.
+Note: this file currently follows Python 3.7 syntax.
+"""
+
+__author__ = 'Natural Stupidity'
+__copyright__ = '© 2020 Natural Stupidity, Expendibots Game'
+__version__ = '1.0'
+__email__ = 'b.tran17@student.unimelb.edu.au'
+
+
+class TranspositionTable:
+    """
+    A table of fixed capacity, mapping the key of a board to the depth
+    it has been searched to, and the value (a result or a bound) found
+    by that search. Each key has one slot, chosen by the key modulo the
+    number of slots. When two keys fall in the same slot, the policy
+    decides which entry is kept:
+    - 'depth' (depth-preferred): one entry per slot, replaced only by
+    an entry searched at least as deep.
+    - 'two-tier': two entries per slot, the deepest one, which follows
+    the depth-preferred rule, and the most recent one, which is always
+    replaced.
+    """
+    POLICIES = ('depth', 'two-tier')
+    DEFAULT_SIZE = 1 << 18
+
+    def __init__(self, size=DEFAULT_SIZE, policy='depth'):
+        """
+        :param size: the maximum number of entries kept in the table.
+        :param policy: the replacement policy, 'depth' or 'two-tier'.
+        """
+        if policy not in TranspositionTable.POLICIES:
+            raise ValueError('Unknown replacement policy: {}.'.format(policy))
+        self.policy = policy
+        self.ways = 1 if policy == 'depth' else 2
+        self.slots = max(1, size // self.ways)
+        self.keys = [None] * (self.slots * self.ways)
+        self.depths = [0] * (self.slots * self.ways)
+        self.values = [None] * (self.slots * self.ways)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self.keys) - self.keys.count(None)
+
+    def __str__(self) -> str:
+        return 'TranspositionTable({} policy, {}/{} entries, ' \
+               '{} hits, {} misses, {} evictions)' \
+            .format(self.policy, len(self), len(self.keys),
+                    self.hits, self.misses, self.evictions)
+
+    def probe(self, key):
+        """
+        Returns the (depth, value) stored for the key, or None if the
+        key is not in the table.
+        :param key: the key of the board.
+        """
+        index = (key % self.slots) * self.ways
+        for i in range(index, index + self.ways):
+            if self.keys[i] == key:
+                self.hits += 1
+                return self.depths[i], self.values[i]
+        self.misses += 1
+        return None
+
+    def store(self, key, depth, value):
+        """
+        Stores the depth and the value found for the key, following
+        the replacement policy of the table.
+        :param key: the key of the board.
+        :param depth: the depth the board has been searched to.
+        :param value: the result or the bound found by that search.
+        """
+        index = (key % self.slots) * self.ways
+        if self.ways == 2 and self.keys[index + 1] == key:
+            # Already held by the most recent tier.
+            if depth < self.depths[index]:
+                self._write(index + 1, key, depth, value)
+                return
+            self.keys[index + 1] = None
+        if self.keys[index] is None or self.keys[index] == key \
+                or depth >= self.depths[index]:
+            if self.ways == 2 and self.keys[index] not in (None, key):
+                # The deepest entry is demoted to the most recent tier.
+                self._write(index + 1, self.keys[index],
+                            self.depths[index], self.values[index])
+            self._write(index, key, depth, value)
+        elif self.ways == 2:
+            self._write(index + 1, key, depth, value)
+
+    def _write(self, i, key, depth, value):
+        """
+        Writes an entry in the i-th position of the table, counting
+        an eviction if another key was held there.
+        """
+        if self.keys[i] is not None and self.keys[i] != key:
+            self.evictions += 1
+        self.keys[i] = key
+        self.depths[i] = depth
+        self.values[i] = value
+
+    def clear(self):
+        """
+        Removes all entries from the table, keeping the counters.
+        """
+        self.keys = [None] * len(self.keys)
+        self.depths = [0] * len(self.depths)
+        self.values = [None] * len(self.values)
@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+
+"""
+File: vectorised.py
+Contains the batch evaluation of sibling states with NumPy: all the
+boards are packed into arrays of stack heights (one plane per color),
+then evaluated at once. NumPy is optional, and only needed when the
+ArtificialPlayer is created with vectorised=True.
+Note: this file currently follows Python 3.7 syntax.
+"""
+
+from .bitboard import BitBoard
+from .heuristics import MANHATTAN, NUM_SQUARES
+from .movegen import NEIGHBOURS
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+__author__ = 'Natural Stupidity'
+__copyright__ = '© 2020 Natural Stupidity, Expendibots Game'
+__version__ = '1.0'
+__email__ = 'b.tran17@student.unimelb.edu.au'
+
+if numpy is not None:
+    _MANHATTAN = numpy.array(MANHATTAN, dtype=numpy.int64)
+    # _ADJACENCY[a][b] is True if b is a or one of its 8 neighbours.
+    _ADJACENCY = numpy.eye(NUM_SQUARES, dtype=numpy.int64)
+    for _square in range(0, NUM_SQUARES):
+        _ADJACENCY[_square, list(NEIGHBOURS[_square])] = 1
+    _SHIFTS = numpy.arange(NUM_SQUARES, dtype=numpy.uint64)
+
+
+def available() -> bool:
+    """
+    Returns True if NumPy is installed.
+    """
+    return numpy is not None
+
+
+def require():
+    """
+    Raises an ImportError if NumPy is not installed.
+    """
+    if numpy is None:
+        raise ImportError('NumPy is required for the vectorised evaluation.')
+
+
+class BatchEvaluation:
+    """
+    The evaluation of a batch of boards, as arrays indexed like
+    the boards:
+    - heuristics: the heuristic of the ArtificialPlayer.
+    - goals: True if no black piece is left.
+    - boom_coverage: the number of black pieces that a boom at
+    some white stack would remove.
+    """
+
+    def __init__(self, heuristics, goals, boom_coverage):
+        self.heuristics = heuristics
+        self.goals = goals
+        self.boom_coverage = boom_coverage
+
+    def __len__(self) -> int:
+        return len(self.heuristics)
+
+    def order(self) -> list:
+        """
+        Returns the indexes of the boards, most promising first: the
+        goals, then the highest boom coverage, then the lowest heuristic.
+        """
+        return numpy.lexsort((self.heuristics, -self.boom_coverage,
+                              ~self.goals)).tolist()
+
+
+def pack(boards) -> tuple:
+    """
+    Packs the boards into two (len(boards), 64) arrays, holding the
+    heights of the white stacks and of the black stacks.
+    :param boards: a list of artifacts.Board or bitboard.BitBoard.
+    """
+    require()
+    if boards and all(isinstance(board, BitBoard) for board in boards):
+        heights = numpy.frombuffer(b''.join(bytes(board.heights)
+                                            for board in boards),
+                                   dtype=numpy.uint8) \
+            .reshape(len(boards), NUM_SQUARES).astype(numpy.int64)
+        white = numpy.array([board.white for board in boards],
+                            dtype=numpy.uint64)
+        white = ((white[:, None] >> _SHIFTS) & 1).astype(bool)
+        return numpy.where(white, heights, 0), numpy.where(white, 0, heights)
+    white = numpy.zeros((len(boards), NUM_SQUARES), dtype=numpy.int64)
+    black = numpy.zeros((len(boards), NUM_SQUARES), dtype=numpy.int64)
+    for (i, board) in enumerate(boards):
+        coords = board.classify_mark()
+        for (n, x, y) in coords['white']:
+            white[i, x * 8 + y] = n
+        for (n, x, y) in coords['black']:
+            black[i, x * 8 + y] = n
+    return white, black
+
+
+def evaluate(boards) -> BatchEvaluation:
+    """
+    Evaluates all the boards at once.
+    :param boards: a list of artifacts.Board or bitboard.BitBoard.
+    """
+    white, black = pack(boards)
+    black_occupied = (black > 0).astype(numpy.int64)
+    heuristics = ((white @ _MANHATTAN) * black_occupied).sum(axis=1)
+    goals = black.sum(axis=1) == 0
+
+    # The stacks removed by a boom at some white stack are the ones
+    # 8-connected to a white stack: grow the white stacks one square
+    # at a time over the occupied squares, until nothing changes.
+    occupied = (white > 0) | (black > 0)
+    reached = white > 0
+    while True:
+        grown = ((reached.astype(numpy.int64) @ _ADJACENCY) > 0) & occupied
+        if (grown == reached).all():
+            break
+        reached = grown
+    boom_coverage = (black * reached).sum(axis=1)
+    return BatchEvaluation(heuristics, goals, boom_coverage)
@@ -0,0 +1,41 @@
+#!/usr/bin/env python
+
+"""
+File: zobrist.py
+Contains the Zobrist keys used to hash the Expendibots boards.
+The key of a board is the XOR of the keys of all its stacks, so that it
+can be updated incrementally whenever a stack is added or removed.
+Note: this file currently follows Python 3.7 syntax.
+"""
+
+from random import Random
+
+__author__ = 'Natural Stupidity'
+__copyright__ = '© 2020 Natural Stupidity, Expendibots Game'
+__version__ = '1.0'
+__email__ = 'b.tran17@student.unimelb.edu.au'
+
+NUM_SQUARES = 64
+# Each player starts the game with 12 pieces.
+MAX_HEIGHT = 12
+# Fixed seed, so that the keys are stable across runs.
+SEED = 30024
+
+_random = Random(SEED)
+ZOBRIST = {color: [[_random.getrandbits(64) for height in range(0, MAX_HEIGHT + 1)]
+                   for square in range(0, NUM_SQUARES)]
+           for color in ('white', 'black')}
+# XORed into the key of a board when black is to move, so that the
+# positions of a game (see adversarial) are keyed by the side to move too.
+SIDE_KEY = _random.getrandbits(64)
+
+
+def stack_key(color, square, height) -> int:
+    """
+    Returns the Zobrist key of a stack of the given color and
+    height, sitting on the given square (x * 8 + y).
+    :param color: 'white' or 'black'.
+    :param square: the square index of the stack.
+    :param height: the number of pieces in the stack.
+    """
+    return ZOBRIST[color][square][height]